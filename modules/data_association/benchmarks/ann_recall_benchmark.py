@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.gallery_index import ExactIndex, IVFIndex
+
+
+def make_gallery(gallery_size, queries, noise, seed=0):
+    """Synthetic 128-d gallery with the scale of face_recognition encodings, and noisy queries of known rows."""
+    rng = np.random.default_rng(seed)
+    gallery = rng.normal(0.0, 0.09, (gallery_size, 128))
+    targets = rng.choice(gallery_size, queries, replace=False)
+    probes = gallery[targets] + rng.normal(0.0, noise, (queries, 128))
+    return gallery, probes
+
+
+def time_search(index, probes, k, batch_size):
+    """Return the nearest rows for every probe and the mean latency per probe in milliseconds."""
+    start_time = time.perf_counter()
+    rows = np.concatenate([index.search(probes[i:i + batch_size], k)[1] for i in range(0, len(probes), batch_size)])
+    return rows, (time.perf_counter() - start_time) / len(probes) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs latency of the IVF gallery index against exact search.")
+    parser.add_argument("--gallery-size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.03)
+    parser.add_argument("--n-lists", type=int, default=256)
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--batch-size", type=int, default=4, help="Faces searched together, as in one frame.")
+    args = parser.parse_args()
+
+    gallery, probes = make_gallery(args.gallery_size, args.queries, args.noise)
+
+    exact_rows, exact_latency = time_search(ExactIndex(gallery), probes, 1, args.batch_size)
+    print(f"exact: {exact_latency:.3f} ms/query")
+
+    start_time = time.perf_counter()
+    ivf = IVFIndex.build(gallery, n_lists=args.n_lists)
+    print(f"ivf build with {args.n_lists} lists: {time.perf_counter() - start_time:.1f}s")
+
+    print(f"{'n_probe':>8} {'recall@1':>9} {'ms/query':>9} {'speedup':>8}")
+    for n_probe in args.n_probe:
+        ivf.n_probe = n_probe
+        rows, latency = time_search(ivf, probes, 1, args.batch_size)
+        recall = float(np.mean(rows[:, 0] == exact_rows[:, 0]))
+        print(f"{n_probe:>8} {recall:>9.3f} {latency:>9.3f} {exact_latency / latency:>8.1f}")
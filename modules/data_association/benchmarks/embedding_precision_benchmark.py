@@ -0,0 +1,51 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.gallery_index import pairwise_distances
+
+
+def make_pairs(gallery_size, queries, noise, seed=0):
+    """Synthetic 128-d gallery with the scale of face_recognition encodings, and noisy queries of known rows.
+
+    The default noise puts the distance of a query to its own row around 0.6, the usual threshold.
+    """
+    rng = np.random.default_rng(seed)
+    gallery = rng.normal(0.0, 0.09, (gallery_size, 128))
+    targets = rng.choice(gallery_size, queries, replace=False)
+    probes = gallery[targets] + rng.normal(0.0, noise, (queries, 128))
+    return gallery, probes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy of float32 and float16 gallery storage against float64.")
+    parser.add_argument("--gallery-size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.053)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--margin", type=float, default=0.01, help="Half-width of the band counted as near the threshold.")
+    args = parser.parse_args()
+
+    gallery, probes = make_pairs(args.gallery_size, args.queries, args.noise)
+    reference = pairwise_distances(probes, gallery)
+    reference_nearest = reference.argmin(axis=1)
+    near_threshold = np.abs(reference - args.threshold) < args.margin
+    print(f"float64 gallery: {gallery.nbytes / 1e6:.1f} MB")
+    print(f"{int(near_threshold.sum())} of {reference.size} distances within {args.margin} of {args.threshold}")
+
+    print(f"{'dtype':>8} {'MB':>7} {'max err':>9} {'mean err':>9} {'flips':>6} {'flips near':>11} {'nn agree':>9}")
+    for dtype in ("float32", "float16"):
+        stored = gallery.astype(dtype)
+        distances = pairwise_distances(probes, stored)
+        error = np.abs(distances - reference)
+        # A flip is a pair whose side of the threshold changes with the storage precision
+        flips = (distances < args.threshold) != (reference < args.threshold)
+        nn_agree = float(np.mean(distances.argmin(axis=1) == reference_nearest))
+        print(
+            f"{dtype:>8} {stored.nbytes / 1e6:>7.1f} {error.max():>9.2e} {error.mean():>9.2e} "
+            f"{int(flips.sum()):>6} {int((flips & near_threshold).sum()):>11} {nn_agree:>9.3f}"
+        )
@@ -5,6 +5,10 @@ from utils import utils
 from modules import data_association_module
 
 
+# Settings that may be left as None in config.py, where None disables the feature
+OPTIONAL_KEYS = ("reference_cache_path", "max_reference_shorter_side")
+
+
 def load_config_from_py():
     """Load configuration from config.py"""
     try:
@@ -13,11 +17,22 @@ def load_config_from_py():
             "detection_results_path": getattr(config, "APP_PATH_DETECTION_RESULTS", None),
             "association_output_path": getattr(config, "APP_PATH_ASSOCIATION_OUTPUT", None),
             "similarity_threshold": getattr(config, "APP_PARAMETER_SIMILARITY_THRESHOLD", 0.6),
+            "top_k": getattr(config, "APP_PARAMETER_TOP_K", 1),
+            "workers": getattr(config, "APP_PARAMETER_WORKERS", 1),
+            "chunksize": getattr(config, "APP_PARAMETER_CHUNKSIZE", 4),
+            "association_output_format": getattr(config, "APP_PARAMETER_ASSOCIATION_OUTPUT_FORMAT", "json"),
+            "flush_every": getattr(config, "APP_PARAMETER_FLUSH_EVERY", 1000),
+            "incremental": getattr(config, "APP_PARAMETER_INCREMENTAL", False),
+            "track_association": getattr(config, "APP_TRACK_ASSOCIATION", {"use_tracks": False}),
             "resize_reference_images": getattr(config, "APP_PARAMETER_RESIZE_REFERENCE_IMAGES", False),
-            "resize_factor": getattr(config, "APP_PARAMETER_RESIZE_FACTOR", 1.0)
+            "resize_factor": getattr(config, "APP_PARAMETER_RESIZE_FACTOR", 1.0),
+            "max_reference_shorter_side": getattr(config, "APP_PARAMETER_MAX_REFERENCE_SHORTER_SIDE", None),
+            "reference_cache_path": getattr(config, "APP_PATH_REFERENCE_CACHE", None),
+            "gallery_index": getattr(config, "APP_GALLERY_INDEX", {"type": "exact"}),
+            "embedding_store": getattr(config, "APP_EMBEDDING_STORE", {"path": None, "dtype": "float32"})
         }
-        if None in config_dict.values():
-            missing_keys = [k for k, v in config_dict.items() if v is None]
+        missing_keys = [k for k, v in config_dict.items() if v is None and k not in OPTIONAL_KEYS]
+        if missing_keys:
             raise ValueError(f"Missing keys in config.py: {', '.join(missing_keys)}")
         return config_dict
     except ImportError:
@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AssociationManifest:
+    """Record of the detection files already associated, for incremental and resumable runs.
+
+    The associations of each detection file are kept in their own part file, and the manifest
+    maps every finished file to its content hash. The manifest is an append-only JSONL log whose
+    first line holds the gallery version, so an interrupted run keeps every file it finished,
+    and a changed gallery (or matching settings) invalidates every part.
+    """
+
+    def __init__(self, output_dir, gallery_version):
+        self.manifest_path = os.path.join(output_dir, "association_manifest.jsonl")
+        self.parts_dir = os.path.join(output_dir, "association_parts")
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self.gallery_version = gallery_version
+        self.entries = self._load()
+
+        # Compact the log to one line per file before appending to it
+        temporary_path = f"{self.manifest_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"gallery_version": gallery_version}) + "\n")
+            for file, file_hash in self.entries.items():
+                f.write(json.dumps({"file": file, "hash": file_hash}) + "\n")
+        os.replace(temporary_path, self.manifest_path)
+        self.file = open(self.manifest_path, 'a', encoding='utf-8')
+
+    def _load(self):
+        """Return {file: file_hash} from an existing manifest built with the same gallery version."""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        entries = {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            if not header.strip() or json.loads(header).get("gallery_version") != self.gallery_version:
+                print("Association manifest was built with a different gallery, re-associating every file.")
+                return {}
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line cut short by an interrupted run
+                    continue
+                entries[entry["file"]] = entry["hash"]
+        return entries
+
+    def part_path(self, file):
+        name = hashlib.sha1(os.path.abspath(file).encode('utf-8')).hexdigest()
+        return os.path.join(self.parts_dir, f"{name}.jsonl")
+
+    def is_current(self, file, file_hash):
+        """Return True when the file was already associated with this content and gallery."""
+        return self.entries.get(file) == file_hash and os.path.exists(self.part_path(file))
+
+    def save_part(self, file, file_hash, associations):
+        """Write the associations of a file, then record it in the manifest."""
+        part_path = self.part_path(file)
+        temporary_path = f"{part_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            for association in associations:
+                f.write(json.dumps(association) + "\n")
+        os.replace(temporary_path, part_path)
+
+        self.entries[file] = file_hash
+        self.file.write(json.dumps({"file": file, "hash": file_hash}) + "\n")
+        self.file.flush()
+
+    def load_part(self, file):
+        with open(self.part_path(file), 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,51 @@
+import os
+import json
+
+
+class JsonArrayWriter:
+    """Stream association records into a JSON array, one record at a time.
+
+    The file has the same layout as json.dump(records, f, indent=4), but records are written as
+    they are produced, so memory stays constant. A crash leaves the records written so far in
+    an unterminated array.
+    """
+
+    def __init__(self, output_path, flush_every=1000):
+        self.output_path = output_path
+        self.flush_every = flush_every
+        self.file = open(output_path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, record):
+        text = json.dumps(record, indent=4).replace('\n', '\n    ')
+        self.file.write(("[\n    " if self.count == 0 else ",\n    ") + text)
+        self._written()
+
+    def _written(self):
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.write("\n]" if self.count else "[]")
+        self.file.close()
+
+
+class JsonlWriter(JsonArrayWriter):
+    """Stream association records as JSON lines. Every complete line survives a crash."""
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self._written()
+
+    def close(self):
+        self.file.close()
+
+
+def open_association_writer(output_dir, output_format="json", flush_every=1000):
+    """Open a streaming writer for associations.json (output_format "json") or associations.jsonl ("jsonl")."""
+    if output_format == "jsonl":
+        return JsonlWriter(os.path.join(output_dir, "associations.jsonl"), flush_every)
+    if output_format == "json":
+        return JsonArrayWriter(os.path.join(output_dir, "associations.json"), flush_every)
+    raise ValueError(f"Unknown association output format: {output_format}")
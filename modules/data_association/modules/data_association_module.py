@@ -1,116 +1,570 @@
 import os
 import json
 import time
+import copy
+import base64
+import hashlib
 from datetime import datetime
+from multiprocessing import Pool
 import face_recognition
 from tqdm import tqdm
 from PIL import Image
 import numpy as np
 
+from modules import reference_cache, gallery_index, face_tracks
+from modules.association_writer import open_association_writer
+from modules.association_manifest import AssociationManifest, hash_file
+from modules.embedding_store import save_embedding_store, load_embedding_store
 
-def load_reference_faces(reference_dataset_path, resize_images=False, resize_factor=1.0):
-    """Load and encode faces from the reference dataset, with optional resizing."""
-    reference_encodings = {}
-    person_list = os.listdir(reference_dataset_path)
-    for person_name in tqdm(person_list, desc="Loading reference faces"):
+
+def encode_reference_image(image_path, resize_images=False, resize_factor=1.0, max_shorter_side=None):
+    """Load, optionally resize and encode a reference image. Returns None when no face is found.
+
+    With max_shorter_side, images whose shorter side is larger are downscaled to it before encoding.
+    """
+    image = face_recognition.load_image_file(image_path)
+    if resize_images:
+        # print informativo de que está redimensionando a imagem original de tanto para tanto
+        pil_image = Image.fromarray(image)
+        new_size = (int(pil_image.width * resize_factor), int(pil_image.height * resize_factor))
+        pil_image = pil_image.resize(new_size)
+        image = np.array(pil_image)  # Convert PIL image back to numpy array for face_recognition
+
+    if max_shorter_side and min(image.shape[:2]) > max_shorter_side:
+        scale = max_shorter_side / min(image.shape[:2])
+        pil_image = Image.fromarray(image)
+        pil_image = pil_image.resize((round(pil_image.width * scale), round(pil_image.height * scale)))
+        image = np.array(pil_image)
+
+    encoding = face_recognition.face_encodings(image)
+    return encoding[0] if encoding else None
+
+
+def encode_reference_task(task):
+    """Pool task: encode one reference image from an (image_path, resize_images, resize_factor, max_shorter_side) tuple."""
+    return encode_reference_image(*task)
+
+
+def list_reference_images(reference_dataset_path):
+    """Return the person names and the (person_name, image_path) pairs of the reference dataset, sorted."""
+    persons = []
+    images = []
+    for person_name in sorted(os.listdir(reference_dataset_path)):
         person_path = os.path.join(reference_dataset_path, person_name)
         if os.path.isdir(person_path):
-            encodings = []
-            for image_file in os.listdir(person_path):
-                image_path = os.path.join(person_path, image_file)
-                
-                # Load and optionally resize the image
-                image = face_recognition.load_image_file(image_path)
-                if resize_images:
-                    # print informativo de que está redimensionando a imagem original de tanto para tanto
-                    pil_image = Image.fromarray(image)
-                    new_size = (int(pil_image.width * resize_factor), int(pil_image.height * resize_factor))
-                    pil_image = pil_image.resize(new_size)
-                    image = np.array(pil_image)  # Convert PIL image back to numpy array for face_recognition
-
-                encoding = face_recognition.face_encodings(image)
-                if encoding:
-                    encodings.append(encoding[0])
-            reference_encodings[person_name] = encodings
+            persons.append(person_name)
+            images.extend(
+                (person_name, os.path.join(person_path, image_file))
+                for image_file in sorted(os.listdir(person_path))
+            )
+    return persons, images
+
+
+def load_reference_faces(reference_dataset_path, resize_images=False, resize_factor=1.0, cache_path=None,
+                         workers=1, max_shorter_side=None):
+    """Load and encode faces from the reference dataset, with optional resizing.
+
+    With a cache_path, encodings are kept in an .npz file keyed by image path, mtime and size,
+    and only added or changed images are re-encoded. With workers > 1 the images to encode are
+    spread over a process pool; the encodings are gathered in the same order as the serial path.
+    """
+    settings = {"resize_images": resize_images, "resize_factor": resize_factor}
+    if max_shorter_side:
+        settings["max_shorter_side"] = max_shorter_side
+    cached_entries = reference_cache.load_reference_cache(cache_path, settings)
+
+    persons, images = list_reference_images(reference_dataset_path)
+    signatures = [reference_cache.file_signature(image_path) for _, image_path in images]
+    encodings = [None] * len(images)
+    to_encode = []
+    for position, ((_, image_path), (mtime, size)) in enumerate(zip(images, signatures)):
+        cached = cached_entries.get(image_path)
+        if cached is not None and cached[0] == mtime and cached[1] == size:
+            encodings[position] = cached[2]
+        else:
+            to_encode.append(position)
+
+    tasks = [(images[position][1], resize_images, resize_factor, max_shorter_side) for position in to_encode]
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            encoded = list(tqdm(
+                pool.imap(encode_reference_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))),
+                total=len(tasks), desc="Loading reference faces"
+            ))
+    else:
+        encoded = [encode_reference_task(task) for task in tqdm(tasks, desc="Loading reference faces")]
+    for position, encoding in zip(to_encode, encoded):
+        encodings[position] = encoding
+
+    reference_encodings = {person_name: [] for person_name in persons}
+    entries = {}
+    for (person_name, image_path), (mtime, size), encoding in zip(images, signatures, encodings):
+        entries[image_path] = (mtime, size, encoding)
+        if encoding is not None:
+            reference_encodings[person_name].append(encoding)
+
+    if cache_path:
+        reference_cache.save_reference_cache(cache_path, settings, entries)
+        print(f"Reference cache: {len(entries) - len(to_encode)} images reused, {len(to_encode)} encoded.")
     print(f"Loaded reference encodings for {len(reference_encodings)} people.")
     return reference_encodings
 
 
-def associate_faces(detection_results_path, reference_encodings, similarity_threshold, utils):
-    """Associate detected faces with the reference dataset based on similarity threshold."""
-    associations = []
+def find_detection_files(detection_results_path):
+    """List per-frame detection files (*_faces.json) and per-video shards (*_faces.jsonl)."""
     all_files = []
-
     for root, _, files in os.walk(detection_results_path):
-        all_files.extend([os.path.join(root, file) for file in files if file.endswith('_faces.json')])
+        all_files.extend([
+            os.path.join(root, file) for file in files
+            if file.endswith('_faces.json') or file.endswith('_faces.jsonl')
+        ])
+    return sorted(all_files)
 
-    print("Starting face association process...")
-    for file in tqdm(all_files, desc="Processing files for face association"):
-        with open(file, 'r', encoding='utf-8') as f:
-            detection_data = json.load(f)
-
-        frame_file = detection_data["frame_file"]
-        frame_path = detection_data["absolute_image_path"]
-        detection_json_path = utils['format_path_for_json'](os.path.abspath(file))
-        frame_metadata = detection_data["frame_metadata"]
-        detection_method = detection_data["detection_method"]
-        processing_time = detection_data.get("processing_time_seconds", 0)
-
-        image = face_recognition.load_image_file(frame_path)
-
-        face_locations = detection_data["face_locations"]
-        detected_encodings = face_recognition.face_encodings(
-            image, known_face_locations=[
-                (loc['top'], loc['right'], loc['bottom'], loc['left']) for loc in face_locations
-            ]
+
+def iter_detection_records(file):
+    """Yield the detection records stored in a detection file, streaming JSONL shards line by line."""
+    with open(file, 'r', encoding='utf-8') as f:
+        if file.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield json.load(f)
+
+
+def build_gallery(reference_encodings, index_settings=None, store_settings=None):
+    """Pack the reference encodings into one contiguous matrix with a parallel label array.
+
+    Rows of the same person are stored together, and offsets marks where each person's rows start.
+    The matrix is searched through a gallery index (exact by default, see gallery_index.py).
+    With a store_settings path the matrix is written to a compact embedding store (float32 or
+    float16) and used memory-mapped from there.
+    """
+    rows = []
+    persons = []
+    offsets = []
+    for person, encodings in reference_encodings.items():
+        if not encodings:
+            print(f"No encodings found for {person}, skipping...")
+            continue
+        offsets.append(len(rows))
+        persons.append(person)
+        rows.extend(encodings)
+
+    matrix = np.ascontiguousarray(np.array(rows, dtype=np.float64).reshape(-1, 128))
+    counts = np.diff(offsets + [len(rows)])
+    labels = np.repeat(np.arange(len(persons)), counts)
+
+    store_path = (store_settings or {}).get("path") if len(rows) else None
+    if store_path:
+        save_embedding_store(store_path, matrix, labels, persons, store_settings.get("dtype", "float32"))
+        matrix, labels, persons = load_embedding_store(store_path)
+        print(f"Gallery stored as {matrix.dtype} in {store_path} ({matrix.nbytes / 1e6:.1f} MB)")
+
+    return {
+        "matrix": matrix,
+        "labels": labels,
+        "persons": persons,
+        "store_path": store_path,
+        "offsets": np.array(offsets, dtype=np.intp),
+        "max_rows_per_person": int(counts.max()) if len(counts) else 0,
+        "index": open_gallery_index(matrix, index_settings or {}) if len(rows) else None
+    }
+
+
+def detach_gallery(gallery):
+    """Return the gallery to send to worker processes.
+
+    A stored gallery is sent without its matrix, and each worker maps the store itself
+    (see attach_gallery), so the rows are shared by every process instead of pickled.
+    """
+    if not gallery.get("store_path"):
+        return gallery
+    index = copy.copy(gallery["index"])
+    index.matrix = None
+    return dict(gallery, matrix=None, index=index)
+
+
+def attach_gallery(gallery):
+    """Map the matrix of a gallery detached by detach_gallery."""
+    if gallery.get("store_path") and gallery["matrix"] is None:
+        matrix, _, _ = load_embedding_store(gallery["store_path"])
+        gallery["matrix"] = matrix
+        gallery["index"].matrix = matrix
+    return gallery
+
+
+def open_gallery_index(matrix, index_settings):
+    """Load the saved gallery index when it matches the gallery, otherwise build (and save) it."""
+    index_type = index_settings.get("type", "exact")
+    index_path = index_settings.get("index_path")
+    n_probe = index_settings.get("n_probe", 8)
+    # IVFIndex.build caps the number of partitions at the gallery size
+    n_lists = max(1, min(index_settings.get("n_lists", 256), len(matrix)))
+
+    if index_path:
+        index = gallery_index.load_index(index_path, matrix, n_probe=n_probe)
+        if (index is not None and index.index_type == index_type
+                and (index_type != "ivf" or len(index.centroids) == n_lists)):
+            print(f"Loaded {index_type} gallery index from {index_path}")
+            return index
+
+    start_time = time.time()
+    index = gallery_index.build_index(matrix, index_type, n_lists=n_lists, n_probe=n_probe)
+    if index_path:
+        gallery_index.save_index(index, index_path)
+    if index_type != "exact":
+        print(f"Built {index_type} gallery index over {len(matrix)} encodings in {time.time() - start_time:.2f}s")
+    return index
+
+
+def match_encodings(encodings, gallery, similarity_threshold, top_k=1):
+    """Match face encodings against the whole gallery at once.
+
+    Returns one (matched_person, distance, candidates) tuple per encoding, where matched_person
+    is the nearest identity (None above the threshold) and candidates lists the top_k nearest
+    identities with their distances. With the exact index the result is the global best match.
+    """
+    if len(encodings) == 0:
+        return []
+    if gallery["index"] is None:
+        return [(None, None, []) for _ in encodings]
+
+    # Each person contributes at most max_rows_per_person rows, so this many rows always hold top_k people
+    top_k = max(1, top_k)
+    row_count = min(len(gallery["matrix"]), top_k * gallery["max_rows_per_person"])
+    distances, rows = gallery["index"].search(np.asarray(encodings, dtype=np.float64), row_count)
+
+    matches = []
+    for row_distances, row_indexes in zip(distances, rows):
+        # Distance to a person is the distance to that person's closest reference image
+        candidates = []
+        seen = set()
+        for distance, row_index in zip(row_distances, row_indexes):
+            if row_index < 0:
+                break
+            person_index = gallery["labels"][row_index]
+            if person_index in seen:
+                continue
+            seen.add(person_index)
+            candidates.append({"person": gallery["persons"][person_index], "distance": float(distance)})
+            if len(candidates) == top_k:
+                break
+
+        if candidates and candidates[0]["distance"] < similarity_threshold:
+            matches.append((candidates[0]["person"], candidates[0]["distance"], candidates))
+        else:
+            matches.append((None, candidates[0]["distance"] if candidates else None, candidates))
+    return matches
+
+
+def decode_face_encodings(face_encodings):
+    """Decode the packed encodings stored by the face detection module into float64 arrays."""
+    matrix = np.frombuffer(base64.b64decode(face_encodings["data"]), dtype=face_encodings["dtype"])
+    return list(matrix.reshape(face_encodings["shape"]).astype(np.float64))
+
+
+def encode_detection_faces(detection_data, face_indexes=None):
+    """Return the encodings of the faces of a detection record (all faces, or those in face_indexes)."""
+    face_locations = detection_data["face_locations"]
+    if face_indexes is None:
+        face_indexes = range(len(face_locations))
+    if "face_encodings" in detection_data:
+        # Encodings computed at detection time, the frame does not need to be reloaded
+        encodings = decode_face_encodings(detection_data["face_encodings"])
+        return [encodings[idx] for idx in face_indexes]
+
+    image = face_recognition.load_image_file(detection_data["absolute_image_path"])
+    return face_recognition.face_encodings(
+        image, known_face_locations=[
+            (face_locations[idx]['top'], face_locations[idx]['right'],
+             face_locations[idx]['bottom'], face_locations[idx]['left'])
+            for idx in face_indexes
+        ]
+    )
+
+
+def build_association(detection_data, detection_json_path, idx, match, distance, candidates, association_time,
+                      top_k=1):
+    """Build the association record of the face at position idx of a detection record."""
+    face_locations = detection_data["face_locations"]
+    association = {
+        "frame_file": detection_data["frame_file"],
+        "absolute_image_path": detection_data["absolute_image_path"],
+        "detection_json_path": detection_json_path,
+        "timestamp": datetime.now().isoformat(),
+        "matched_person": match if match else "unknown",
+        "similarity_distance": distance if match else "not_matched",
+        "detection_method": detection_data["detection_method"],
+        "frame_metadata": detection_data["frame_metadata"],
+        "face_location": face_locations[idx] if face_locations else None,
+        "processing_details": {
+            "detection_time_seconds": detection_data.get("processing_time_seconds", 0),
+            "association_time_seconds": round(association_time, 4),
+            "method_used": "face_recognition" if match else "unknown"
+        }
+    }
+    if top_k > 1:
+        association["top_candidates"] = candidates
+    return association
+
+
+def associate_detection_record(detection_data, detection_json_path, gallery, similarity_threshold, top_k=1):
+    """Associate the faces of a single detection record with the reference gallery."""
+    detected_encodings = encode_detection_faces(detection_data)
+
+    # All faces of the frame are matched in one vectorized computation
+    start_time = time.time()
+    matches = match_encodings(detected_encodings, gallery, similarity_threshold, top_k)
+    association_time = (time.time() - start_time) / max(1, len(matches))
+
+    return [
+        build_association(
+            detection_data, detection_json_path, idx, match, distance, candidates, association_time, top_k
         )
+        for idx, (match, distance, candidates) in enumerate(matches)
+    ]
 
-        for idx, encoding in enumerate(detected_encodings):
-            match = None
-            min_distance = None
-            start_time = time.time()
-            
-            for person, encodings in reference_encodings.items():
-                # Verifica se encodings não está vazio antes de calcular a distância
-                if encodings:
-                    distances = face_recognition.face_distance(encodings, encoding)
-                    if len(distances) > 0:
-                        best_match_index = distances.argmin()
-                        if distances[best_match_index] < similarity_threshold:
-                            match = person
-                            min_distance = distances[best_match_index]
-                            break
-                else:
-                    print(f"No encodings found for {person}, skipping...")
-
-            association_time = time.time() - start_time
-
-            associations.append({
-                "frame_file": frame_file,
-                "absolute_image_path": frame_path,
-                "detection_json_path": detection_json_path,
-                "timestamp": datetime.now().isoformat(),
-                "matched_person": match if match else "unknown",
-                "similarity_distance": min_distance if min_distance else "not_matched",
-                "detection_method": detection_method,
-                "frame_metadata": frame_metadata,
-                "face_location": face_locations[idx] if face_locations else None,
-                "processing_details": {
-                    "detection_time_seconds": processing_time,
-                    "association_time_seconds": round(association_time, 4),
-                    "method_used": "face_recognition" if match else "unknown"
-                }
-            })
 
-    print("Face association process completed.")
+def associate_detection_file(file, detection_json_path, gallery, similarity_threshold, top_k=1):
+    """Associate every detection record of a detection file, in record order."""
+    associations = []
+    for detection_data in iter_detection_records(file):
+        associations.extend(associate_detection_record(
+            detection_data, detection_json_path, gallery, similarity_threshold, top_k
+        ))
+    return associations
+
+
+def track_identity(matches):
+    """Vote the identity of a track from the matches of its representative faces.
+
+    The most frequently matched person wins, ties going to the smallest distance. Returns
+    (matched_person, distance, candidates), with matched_person None when no representative matched.
+    """
+    votes = {}
+    for match, distance, candidates in matches:
+        if match:
+            count, best = votes.get(match, (0, None))
+            if best is None or distance < best[1]:
+                best = (match, distance, candidates)
+            votes[match] = (count + 1, best)
+    if votes:
+        _, best = max(votes.values(), key=lambda vote: (vote[0], -vote[1][1]))
+        return best
+
+    measured = [match for match in matches if match[1] is not None]
+    if measured:
+        return min(measured, key=lambda match: match[1])
+    return None, None, []
+
+
+def associate_detection_files_by_track(files, gallery, similarity_threshold, top_k=1, track_settings=None):
+    """Associate the detection files of one video through face tracks.
+
+    Faces are linked into tracks by box overlap across consecutive frames. Only a few
+    representative faces of each track are encoded and matched, and the voted identity is
+    propagated to the whole track. Records carry a track_id and an identity_source of "matched"
+    (representative faces) or "inferred" (faces that took the identity of their track).
+    Records are returned in file and record order, as in the per-frame path.
+    """
+    track_settings = track_settings or {}
+    records = [
+        (detection_json_path, detection_data)
+        for file, detection_json_path in files
+        for detection_data in iter_detection_records(file)
+    ]
+    tracks = face_tracks.build_tracks(
+        [detection_data for _, detection_data in records],
+        iou_threshold=track_settings.get("iou_threshold", 0.5),
+        max_frame_gap=track_settings.get("max_frame_gap", 1)
+    )
+
+    assignments = {}
+    for track_id, track in enumerate(tracks):
+        representatives = face_tracks.select_representatives(track, track_settings.get("representatives", 3))
+        encodings = []
+        for record_index, face_index in representatives:
+            encodings.extend(encode_detection_faces(records[record_index][1], [face_index]))
+
+        start_time = time.time()
+        match, distance, candidates = track_identity(
+            match_encodings(encodings, gallery, similarity_threshold, top_k)
+        )
+        association_time = (time.time() - start_time) / len(track)
+
+        representatives = set(representatives)
+        for face in track:
+            source = "matched" if face in representatives else "inferred"
+            assignments[face] = (track_id, match, distance, candidates, association_time, source)
+
+    associations = []
+    for record_index, (detection_json_path, detection_data) in enumerate(records):
+        for face_index in range(len(detection_data["face_locations"])):
+            track_id, match, distance, candidates, association_time, source = assignments[(record_index, face_index)]
+            association = build_association(
+                detection_data, detection_json_path, face_index, match, distance, candidates, association_time, top_k
+            )
+            association["track_id"] = track_id
+            association["identity_source"] = source
+            associations.append(association)
     return associations
 
 
-def save_associations(associations, output_path):
-    """Save association results to a JSON file."""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(associations, f, indent=4)
-    print(f"Associations saved to {output_path}")
+def associate_task(files, gallery, similarity_threshold, top_k=1, track_settings=None):
+    """Associate the (file, detection_json_path) pairs of a task, in order."""
+    if track_settings:
+        return associate_detection_files_by_track(files, gallery, similarity_threshold, top_k, track_settings)
+    associations = []
+    for file, detection_json_path in files:
+        associations.extend(associate_detection_file(
+            file, detection_json_path, gallery, similarity_threshold, top_k
+        ))
+    return associations
+
+
+def build_association_tasks(detection_files, utils, group_by_folder=False):
+    """Split the detection files into (key, [(file, detection_json_path), ...]) tasks.
+
+    Each file is its own task, except with group_by_folder, where the files of a folder (one
+    video) form a single task so tracks can span them.
+    """
+    tasks = []
+    for file in detection_files:
+        key = os.path.dirname(file) if group_by_folder else file
+        entry = (file, utils['format_path_for_json'](os.path.abspath(file)))
+        if tasks and tasks[-1][0] == key:
+            tasks[-1][1].append(entry)
+        else:
+            tasks.append((key, [entry]))
+    return tasks
+
+
+# Gallery and matching settings of a worker process of the association pool, set by init_worker
+_WORKER_GALLERY = None
+_WORKER_MATCHING = None
+
+
+def init_worker(gallery, similarity_threshold, top_k, track_settings=None):
+    """Receive the gallery once per worker process instead of once per file."""
+    global _WORKER_GALLERY, _WORKER_MATCHING
+    _WORKER_GALLERY = attach_gallery(gallery)
+    _WORKER_MATCHING = (similarity_threshold, top_k, track_settings)
+
+
+def associate_task_in_worker(task):
+    """Pool task: associate the files of one task with the worker's gallery."""
+    _, files = task
+    similarity_threshold, top_k, track_settings = _WORKER_MATCHING
+    return associate_task(files, _WORKER_GALLERY, similarity_threshold, top_k, track_settings)
+
+
+def gallery_version(gallery, similarity_threshold, top_k, track_settings=None):
+    """Hash of everything that changes the associations of a detection file besides its content."""
+    version = {
+        "matrix": gallery_index.matrix_fingerprint(gallery["matrix"]),
+        "persons": gallery["persons"],
+        # An empty gallery has no index and matches nothing
+        "index": [
+            gallery["index"].index_type if gallery["index"] is not None else "none",
+            getattr(gallery["index"], "n_probe", None),
+            len(gallery["index"].centroids) if hasattr(gallery["index"], "centroids") else None
+        ],
+        "similarity_threshold": similarity_threshold,
+        "top_k": top_k,
+        "track_settings": track_settings
+    }
+    return hashlib.sha1(json.dumps(version, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def hash_task(files):
+    """Content hash of the files of a task."""
+    if len(files) == 1:
+        return hash_file(files[0][0])
+    return hashlib.sha256("".join(hash_file(file) for file, _ in files).encode('utf-8')).hexdigest()
+
+
+def iter_task_associations(tasks, gallery, similarity_threshold, top_k, workers=1, chunksize=4,
+                           track_settings=None):
+    """Yield (key, associations) for every (key, files) task, in task order."""
+    progress = tqdm(total=len(tasks), desc="Processing files for face association")
+    if workers > 1:
+        initargs = (detach_gallery(gallery), similarity_threshold, top_k, track_settings)
+        with Pool(workers, initializer=init_worker, initargs=initargs) as pool:
+            results = pool.imap(associate_task_in_worker, tasks, chunksize=max(1, chunksize))
+            for (key, _), task_associations in zip(tasks, results):
+                progress.update()
+                yield key, task_associations
+    else:
+        for key, files in tasks:
+            task_associations = associate_task(files, gallery, similarity_threshold, top_k, track_settings)
+            progress.update()
+            yield key, task_associations
+    progress.close()
+
+
+def associate_faces(detection_results_path, reference_encodings, similarity_threshold, utils, top_k=1,
+                    index_settings=None, workers=1, chunksize=4, writer=None, incremental_dir=None,
+                    track_settings=None, store_settings=None):
+    """Associate detected faces with the reference dataset based on similarity threshold.
+
+    Each face is assigned its globally nearest identity, not the first one under the threshold.
+    With workers > 1 detection files are spread over a process pool in chunks of chunksize files.
+    Results are merged in file order, so the output does not depend on the worker count.
+    With a writer the records are streamed to it file by file and the number of records is
+    returned; otherwise the list of records is returned.
+    With an incremental_dir, files already associated with the same content and gallery are
+    reused from the association manifest kept there, and only new or changed files are processed.
+    With track_settings, the files of each video are associated together through face tracks
+    (see associate_detection_files_by_track).
+    """
+    associations = []
+    record_count = 0
+
+    def collect(task_associations):
+        nonlocal record_count
+        record_count += len(task_associations)
+        if writer is None:
+            associations.extend(task_associations)
+        else:
+            for association in task_associations:
+                writer.write(association)
+
+    gallery = build_gallery(reference_encodings, index_settings, store_settings)
+    tasks = build_association_tasks(
+        find_detection_files(detection_results_path), utils, group_by_folder=bool(track_settings)
+    )
+
+    manifest = None
+    pending = tasks
+    if incremental_dir:
+        manifest = AssociationManifest(
+            incremental_dir, gallery_version(gallery, similarity_threshold, top_k, track_settings)
+        )
+        task_hashes = {key: hash_task(files) for key, files in tasks}
+        pending = [(key, files) for key, files in tasks if not manifest.is_current(key, task_hashes[key])]
+        print(f"Association manifest: {len(tasks) - len(pending)} tasks reused, {len(pending)} to process.")
+
+    print("Starting face association process...")
+    try:
+        for key, task_associations in iter_task_associations(
+            pending, gallery, similarity_threshold, top_k, workers, chunksize, track_settings
+        ):
+            if manifest is None:
+                collect(task_associations)
+            else:
+                manifest.save_part(key, task_hashes[key], task_associations)
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    if manifest is not None:
+        # Merge the parts of every current task in file order
+        for key, _ in tasks:
+            collect(manifest.load_part(key))
+
+    print("Face association process completed.")
+    return associations if writer is None else record_count
 
 
 def orchestrate_data_association(params, utils):
@@ -120,15 +574,33 @@ def orchestrate_data_association(params, utils):
     reference_encodings = load_reference_faces(
         params["reference_dataset_path"],
         resize_images=params.get("resize_reference_images", False),
-        resize_factor=params.get("resize_factor", 1.0)
+        resize_factor=params.get("resize_factor", 1.0),
+        cache_path=params.get("reference_cache_path"),
+        workers=params.get("workers", 1),
+        max_shorter_side=params.get("max_reference_shorter_side")
     )
-    associations = associate_faces(
-        params["detection_results_path"],
-        reference_encodings,
-        params["similarity_threshold"],
-        utils
+    track_settings = params.get("track_association", {})
+    track_settings = track_settings if track_settings.get("use_tracks") else None
+    writer = open_association_writer(
+        params["association_output_path"],
+        output_format=params.get("association_output_format", "json"),
+        flush_every=params.get("flush_every", 1000)
     )
-
-    output_file = os.path.join(params["association_output_path"], "associations.json")
-    save_associations(associations, output_file)
-    print(f"Associations saved to {output_file}")
+    try:
+        record_count = associate_faces(
+            params["detection_results_path"],
+            reference_encodings,
+            params["similarity_threshold"],
+            utils,
+            top_k=params.get("top_k", 1),
+            index_settings=params.get("gallery_index"),
+            workers=params.get("workers", 1),
+            chunksize=params.get("chunksize", 4),
+            writer=writer,
+            incremental_dir=params["association_output_path"] if params.get("incremental") else None,
+            track_settings=track_settings,
+            store_settings=params.get("embedding_store")
+        )
+    finally:
+        writer.close()
+    print(f"{record_count} associations saved to {writer.output_path}")
@@ -0,0 +1,47 @@
+import os
+import json
+
+import numpy as np
+
+
+def store_paths(store_path):
+    """Return the matrix, labels and persons paths of an embedding store directory."""
+    return (
+        os.path.join(store_path, "embeddings.npy"),
+        os.path.join(store_path, "labels.npy"),
+        os.path.join(store_path, "persons.json")
+    )
+
+
+def save_embedding_store(store_path, matrix, labels, persons, dtype="float32"):
+    """Write the gallery as one contiguous matrix in dtype ("float32" or "float16") with its label table.
+
+    labels holds the person index of every row and persons the names. Files are replaced atomically.
+    """
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported embedding store dtype: {dtype}")
+    os.makedirs(store_path, exist_ok=True)
+    matrix_path, labels_path, persons_path = store_paths(store_path)
+
+    arrays = ((matrix_path, np.asarray(matrix, dtype=dtype)), (labels_path, np.asarray(labels, dtype=np.int32)))
+    for path, array in arrays:
+        with open(f"{path}.tmp", 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(f"{path}.tmp", path)
+    with open(f"{persons_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(persons, f)
+    os.replace(f"{persons_path}.tmp", persons_path)
+
+
+def load_embedding_store(store_path, mmap=True):
+    """Return (matrix, labels, persons) of an embedding store.
+
+    With mmap the matrix is memory-mapped read-only, so every process that opens the store
+    shares the same pages instead of holding its own copy.
+    """
+    matrix_path, labels_path, persons_path = store_paths(store_path)
+    matrix = np.load(matrix_path, mmap_mode='r' if mmap else None)
+    labels = np.load(labels_path)
+    with open(persons_path, 'r', encoding='utf-8') as f:
+        persons = json.load(f)
+    return matrix, labels, persons
@@ -0,0 +1,74 @@
+def box_iou(a, b):
+    """Intersection over union of two {"top", "right", "bottom", "left"} boxes."""
+    inter_w = min(a["right"], b["right"]) - max(a["left"], b["left"])
+    inter_h = min(a["bottom"], b["bottom"]) - max(a["top"], b["top"])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    intersection = inter_w * inter_h
+    area_a = (a["right"] - a["left"]) * (a["bottom"] - a["top"])
+    area_b = (b["right"] - b["left"]) * (b["bottom"] - b["top"])
+    return intersection / float(area_a + area_b - intersection)
+
+
+def build_tracks(records, iou_threshold=0.5, max_frame_gap=1):
+    """Link the faces of detection records into tracks by box overlap across consecutive frames.
+
+    Frames are ordered by frame_number, and max_frame_gap counts sampled frames, so 1 only links
+    a face to a track seen on the previous sampled frame. Faces are assigned greedily, highest IoU
+    first, and each track takes at most one face per frame. Tracks left behind by more than
+    max_frame_gap sampled frames can no longer be extended, so each frame only scans the live tracks.
+    Returns a list of tracks, each a list of (record_index, face_index) in frame order.
+    """
+    frame_numbers = sorted({record["frame_metadata"]["frame_number"] for record in records})
+    frame_positions = {frame_number: position for position, frame_number in enumerate(frame_numbers)}
+    order = sorted(range(len(records)), key=lambda i: records[i]["frame_metadata"]["frame_number"])
+
+    tracks = []
+    # Per track: (position of its last frame, last box)
+    track_ends = []
+    # Indexes of the tracks that can still be extended, in creation order
+    live_tracks = []
+    for record_index in order:
+        record = records[record_index]
+        position = frame_positions[record["frame_metadata"]["frame_number"]]
+        face_locations = record["face_locations"]
+
+        live_tracks = [
+            track_index for track_index in live_tracks if position - track_ends[track_index][0] <= max_frame_gap
+        ]
+        pairs = []
+        for track_index in live_tracks:
+            last_position, last_box = track_ends[track_index]
+            if position == last_position:
+                continue
+            for face_index, box in enumerate(face_locations):
+                iou = box_iou(last_box, box)
+                if iou >= iou_threshold:
+                    pairs.append((iou, track_index, face_index))
+
+        linked_tracks = set()
+        linked_faces = set()
+        for _, track_index, face_index in sorted(pairs, key=lambda pair: -pair[0]):
+            if track_index in linked_tracks or face_index in linked_faces:
+                continue
+            linked_tracks.add(track_index)
+            linked_faces.add(face_index)
+            tracks[track_index].append((record_index, face_index))
+            track_ends[track_index] = (position, face_locations[face_index])
+
+        for face_index, box in enumerate(face_locations):
+            if face_index not in linked_faces:
+                live_tracks.append(len(tracks))
+                tracks.append([(record_index, face_index)])
+                track_ends.append((position, box))
+    return tracks
+
+
+def select_representatives(track, count=3):
+    """Return up to count faces of a track, evenly spaced from the first to the last."""
+    if count <= 1 or len(track) == 1:
+        return [track[len(track) // 2]]
+    if len(track) <= count:
+        return list(track)
+    step = (len(track) - 1) / (count - 1)
+    return [track[round(i * step)] for i in range(count)]
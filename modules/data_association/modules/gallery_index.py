@@ -0,0 +1,160 @@
+import hashlib
+
+import numpy as np
+
+
+def euclidean_distances(encodings, matrix):
+    squared = (
+        np.einsum('ij,ij->i', encodings, encodings)[:, None]
+        + np.einsum('ij,ij->i', matrix, matrix)[None, :]
+        - 2.0 * encodings @ matrix.T
+    )
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+def pairwise_distances(encodings, matrix, block_rows=65536):
+    """Euclidean distances between every encoding and every gallery row, in a single matrix product.
+
+    Compact (float32 or float16) galleries are computed in float32, block_rows rows at a time,
+    so a memory-mapped gallery is never copied whole into memory.
+    """
+    if matrix.dtype == np.float64:
+        return euclidean_distances(encodings, matrix)
+
+    encodings = np.asarray(encodings, dtype=np.float32)
+    distances = np.empty((len(encodings), len(matrix)))
+    for start in range(0, len(matrix), block_rows):
+        block = np.asarray(matrix[start:start + block_rows], dtype=np.float32)
+        distances[:, start:start + len(block)] = euclidean_distances(encodings, block)
+    return distances
+
+
+def smallest_k(distances, k):
+    """Return (distances, positions) of the k smallest values of each row, sorted ascending."""
+    k = min(k, distances.shape[1])
+    positions = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    partial = np.take_along_axis(distances, positions, axis=1)
+    order = np.argsort(partial, axis=1)
+    return np.take_along_axis(partial, order, axis=1), np.take_along_axis(positions, order, axis=1)
+
+
+def matrix_fingerprint(matrix):
+    """Hash of the gallery matrix, used to check that a saved index still matches the gallery."""
+    return hashlib.sha1(np.ascontiguousarray(matrix).data).hexdigest()
+
+
+class ExactIndex:
+    """Brute-force index: every query is compared with every gallery row."""
+
+    index_type = "exact"
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def search(self, queries, k):
+        """Return (distances, row_indices) of the k nearest gallery rows for each query."""
+        return smallest_k(pairwise_distances(queries, self.matrix), k)
+
+    def arrays(self):
+        return {}
+
+
+class IVFIndex:
+    """Inverted-file index: gallery rows are partitioned with k-means, and a query only scans
+    the rows of its n_probe nearest partitions."""
+
+    index_type = "ivf"
+
+    def __init__(self, matrix, centroids, assignments, n_probe=8):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.assignments = assignments
+        self.n_probe = n_probe
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(centroids))]
+
+    @classmethod
+    def build(cls, matrix, n_lists=256, n_probe=8, iterations=10, seed=0, chunk_size=16384):
+        """Partition the gallery with Lloyd's k-means."""
+        rng = np.random.default_rng(seed)
+        n_lists = max(1, min(n_lists, len(matrix)))
+        centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].astype(np.float64)
+        assignments = np.zeros(len(matrix), dtype=np.int64)
+
+        for _ in range(iterations):
+            for start in range(0, len(matrix), chunk_size):
+                chunk = matrix[start:start + chunk_size]
+                assignments[start:start + chunk_size] = pairwise_distances(chunk, centroids).argmin(axis=1)
+
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, matrix)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        return cls(matrix, centroids, assignments, n_probe)
+
+    def search(self, queries, k):
+        """Return (distances, row_indices) of the approximate k nearest gallery rows for each query.
+
+        Queries whose probed partitions hold fewer than k rows are padded with inf distances and -1 indices.
+        """
+        n_probe = min(self.n_probe, len(self.centroids))
+        _, probed = smallest_k(pairwise_distances(queries, self.centroids), n_probe)
+
+        distances = np.full((len(queries), k), np.inf)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        for i, (query, lists) in enumerate(zip(queries, probed)):
+            candidates = np.concatenate([self.lists[list_index] for list_index in lists])
+            if len(candidates) == 0:
+                continue
+            found_distances, positions = smallest_k(pairwise_distances(query[None, :], self.matrix[candidates]), k)
+            distances[i, :found_distances.shape[1]] = found_distances[0]
+            indices[i, :positions.shape[1]] = candidates[positions[0]]
+        return distances, indices
+
+    def arrays(self):
+        return {"centroids": self.centroids, "assignments": self.assignments, "n_probe": np.array(self.n_probe)}
+
+
+def build_index(matrix, index_type="exact", n_lists=256, n_probe=8):
+    """Build a gallery index of the given type ("exact" or "ivf")."""
+    if index_type == "exact":
+        return ExactIndex(matrix)
+    if index_type == "ivf":
+        return IVFIndex.build(matrix, n_lists=n_lists, n_probe=n_probe)
+    raise ValueError(f"Unknown gallery index type: {index_type}")
+
+
+def save_index(index, path):
+    """Save an index with the fingerprint of the gallery it was built on."""
+    with open(path, 'wb') as f:
+        np.savez(
+            f,
+            index_type=np.array(index.index_type),
+            fingerprint=np.array(matrix_fingerprint(index.matrix)),
+            **index.arrays()
+        )
+
+
+def load_index(path, matrix, n_probe=None):
+    """Load a saved index for the given gallery matrix.
+
+    Returns None when the file does not exist or was built on a different gallery.
+    """
+    try:
+        data = np.load(path, allow_pickle=False)
+    except FileNotFoundError:
+        return None
+
+    with data:
+        if str(data["fingerprint"]) != matrix_fingerprint(matrix):
+            return None
+        index_type = str(data["index_type"])
+        if index_type == "exact":
+            return ExactIndex(matrix)
+        return IVFIndex(
+            matrix, data["centroids"], data["assignments"],
+            n_probe=int(data["n_probe"]) if n_probe is None else n_probe
+        )
@@ -0,0 +1,57 @@
+import os
+import json
+
+import numpy as np
+
+
+def file_signature(path):
+    """Return the (mtime, size) pair used to detect changed reference images."""
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def load_reference_cache(cache_path, settings):
+    """Load cached reference encodings as {image_path: (mtime, size, encoding or None)}.
+
+    The cache is ignored when it was built with different encoding settings.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+
+    with np.load(cache_path, allow_pickle=False) as data:
+        if json.loads(str(data["settings"])) != settings:
+            print("Reference cache was built with different settings, re-encoding every image.")
+            return {}
+        return {
+            path: (mtime, size, encoding if has_encoding else None)
+            for path, mtime, size, has_encoding, encoding in zip(
+                data["paths"].tolist(), data["mtimes"], data["sizes"], data["has_encoding"], data["encodings"]
+            )
+        }
+
+
+def save_reference_cache(cache_path, settings, entries):
+    """Write {image_path: (mtime, size, encoding or None)} to an .npz cache, replacing it atomically."""
+    paths = sorted(entries)
+    encodings = np.zeros((len(paths), 128), dtype=np.float64)
+    has_encoding = np.zeros(len(paths), dtype=bool)
+    for i, path in enumerate(paths):
+        encoding = entries[path][2]
+        if encoding is not None:
+            encodings[i] = encoding
+            has_encoding[i] = True
+
+    cache_dir = os.path.dirname(os.path.abspath(cache_path))
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary_path = f"{cache_path}.tmp"
+    with open(temporary_path, 'wb') as f:
+        np.savez(
+            f,
+            settings=np.array(json.dumps(settings, sort_keys=True)),
+            paths=np.array(paths, dtype=str),
+            mtimes=np.array([entries[path][0] for path in paths], dtype=np.float64),
+            sizes=np.array([entries[path][1] for path in paths], dtype=np.int64),
+            has_encoding=has_encoding,
+            encodings=encodings
+        )
+    os.replace(temporary_path, cache_path)
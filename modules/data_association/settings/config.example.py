@@ -12,6 +12,46 @@ APP_PATH_ASSOCIATION_OUTPUT = os.path.join(APP_PATH_DATA, 'associations')
 # Similarity threshold for matching faces
 APP_PARAMETER_SIMILARITY_THRESHOLD = 0.6
 
+# Number of nearest identities reported per face (1 reports only the best match)
+APP_PARAMETER_TOP_K = 1
+
+# Parallel association and reference loading: number of worker processes (1 runs in-process) and detection files per task
+APP_PARAMETER_WORKERS = 1
+APP_PARAMETER_CHUNKSIZE = 4
+
+# Associations are streamed to disk as they are produced: 'json' (associations.json array) or 'jsonl' (associations.jsonl)
+APP_PARAMETER_ASSOCIATION_OUTPUT_FORMAT = 'json'
+APP_PARAMETER_FLUSH_EVERY = 1000                        # Records written between flushes to disk
+
+# Incremental runs: only new or changed detection files are associated, unless the gallery or matching settings changed
+APP_PARAMETER_INCREMENTAL = False
+
 # Parameters for resizing reference images
 APP_PARAMETER_RESIZE_REFERENCE_IMAGES = True            # True to enable resizing
 APP_PARAMETER_RESIZE_FACTOR = 0.5                       # resize factor
+APP_PARAMETER_MAX_REFERENCE_SHORTER_SIDE = None         # Downscale images whose shorter side exceeds this many pixels (None disables it)
+
+# Cache of reference encodings; only added or changed images are re-encoded (None disables it)
+APP_PATH_REFERENCE_CACHE = os.path.join(APP_PATH_DATA, 'reference_cache.npz')
+
+# Index used to search the reference gallery
+APP_GALLERY_INDEX = {
+    "type": "exact",                                    # 'exact' (brute force) or 'ivf' (k-means partitions)
+    "n_lists": 256,                                     # Number of k-means partitions (ivf only)
+    "n_probe": 8,                                       # Partitions scanned per query (ivf only)
+    "index_path": None                                  # Saved .npz index, rebuilt when the gallery changes (None disables it)
+}
+
+# Track-level association: faces are linked across consecutive frames and only a few per track are matched
+APP_TRACK_ASSOCIATION = {
+    "use_tracks": False,                                # True to propagate identities along face tracks
+    "iou_threshold": 0.5,                               # Minimum box overlap to link a face to a track
+    "max_frame_gap": 1,                                 # Sampled frames a track may skip (1 = consecutive only)
+    "representatives": 3                                # Faces matched per track (first, middle, last)
+}
+
+# Compact gallery store, memory-mapped and shared by the worker processes (path None keeps the float64 gallery in memory)
+APP_EMBEDDING_STORE = {
+    "path": None,                                       # Directory with embeddings.npy, labels.npy and persons.json
+    "dtype": "float32"                                  # 'float32' or 'float16'
+}
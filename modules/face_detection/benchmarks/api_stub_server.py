@@ -0,0 +1,53 @@
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency_seconds=0.05, failure_rate=0.0):
+    """Build a request handler that answers like a face detection API after a fixed latency."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_seconds)
+
+            if random.random() < failure_rate:
+                status, body = 503, b'{"error": "unavailable"}'
+            else:
+                status = 200
+                body = json.dumps({"faces": [{"top": 50, "right": 100, "bottom": 150, "left": 75}]}).encode('utf-8')
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(port=0, latency_seconds=0.05, failure_rate=0.0):
+    """Start the stub server on a background thread and return it; server.server_address holds the port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_seconds, failure_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of a face detection API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds to wait before answering.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency, args.failure_rate))
+    print(f"Stub detection API listening on http://127.0.0.1:{args.port}/detect")
+    server.serve_forever()
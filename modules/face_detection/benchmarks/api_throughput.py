@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.api_client import ApiDetectionClient
+from api_stub_server import start_stub_server
+
+
+def measure(endpoint, frames, max_concurrent_requests, max_retries):
+    """Return frames per second and the number of failed frames for a concurrency level."""
+    client = ApiDetectionClient(endpoint, max_concurrent_requests=max_concurrent_requests, max_retries=max_retries,
+                                retry_backoff_seconds=0.01)
+    try:
+        start_time = time.perf_counter()
+        results = []
+        for i in range(0, len(frames), max_concurrent_requests):
+            results.extend(client.detect_batch(frames[i:i + max_concurrent_requests]))
+        elapsed = time.perf_counter() - start_time
+    finally:
+        client.close()
+    failures = sum(1 for _, details in results if details["status"] != "success")
+    return len(frames) / elapsed, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API detection throughput against a local stub server.")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_seconds=args.latency, failure_rate=args.failure_rate)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/detect"
+    frames = [np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(args.frames)]
+
+    print(f"{'concurrency':>12} {'frames/s':>10} {'failed':>8}")
+    for concurrency in args.concurrency:
+        fps, failures = measure(endpoint, frames, concurrency, max_retries=3)
+        print(f"{concurrency:>12} {fps:>10.1f} {failures:>8}")
+    server.shutdown()
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+MODULE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Each snippet runs in a fresh interpreter and reports its import time and peak memory
+MEASURE_TEMPLATE = """
+import time, resource
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print('{{"seconds": %f, "peak_rss_mb": %f}}' % (elapsed, peak_kb / 1024))
+"""
+
+SCENARIOS = {
+    "face_detection_module (lazy backends)": "import modules.face_detection_module",
+    "all backend dependencies (previous eager imports)": (
+        "import modules.face_detection_module\n"
+        "import face_recognition, huggingface_hub, ultralytics, supervision"
+    ),
+    "local backend only": "import modules.face_detection_module\nimport face_recognition",
+    "yolo backend only": "import modules.face_detection_module\nimport huggingface_hub, ultralytics, supervision",
+}
+
+
+def measure(imports, runs):
+    """Return the best import time and its peak memory over several fresh interpreters."""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE_TEMPLATE.format(imports=imports)],
+            cwd=MODULE_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(results, key=lambda result: result["seconds"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure face detection import time with and without backend imports.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<52} {'seconds':>9} {'peak MB':>9}")
+    for name, imports in SCENARIOS.items():
+        try:
+            result = measure(imports, args.runs)
+        except subprocess.CalledProcessError:
+            print(f"{name:<52} {'not installed':>19}")
+            continue
+        print(f"{name:<52} {result['seconds']:>9.3f} {result['peak_rss_mb']:>9.1f}")
@@ -8,25 +8,72 @@ def load_config_from_py():
     try:
         config_dict = {
             "frames_path": getattr(config, "APP_PATH_FRAMES", None),
+            "frame_store_format": getattr(config, "APP_PARAMETER_FRAME_STORE_FORMAT", "files"),
             "faces_output_path": getattr(config, "APP_PATH_FACES_OUTPUT", None),
             "create_model_folder": getattr(config, "APP_PARAMETER_CREATE_MODEL_FOLDER", False),
+            "output_format": getattr(config, "APP_PARAMETER_OUTPUT_FORMAT", "json"),
+            "compute_encodings": getattr(config, "APP_PARAMETER_COMPUTE_ENCODINGS", False),
+            "workers": getattr(config, "APP_PARAMETER_WORKERS", 1),
+            "chunksize": getattr(config, "APP_PARAMETER_CHUNKSIZE", 8),
+            "prefetch_size": getattr(config, "APP_PARAMETER_PREFETCH_SIZE", 0),
+            "io_threads": getattr(config, "APP_PARAMETER_IO_THREADS", 4),
+            "async_write": getattr(config, "APP_PARAMETER_ASYNC_WRITE", False),
             
             "local_detection": {
                 "use_local": getattr(config, "APP_LOCAL_DETECTION", {}).get("use_local", True),
                 "model": getattr(config, "APP_LOCAL_DETECTION", {}).get("model", "hog"),
                 "upscale_factor": getattr(config, "APP_LOCAL_DETECTION", {}).get("upscale_factor", 1),
-                "number_of_times_to_upsample": getattr(config, "APP_LOCAL_DETECTION", {}).get("number_of_times_to_upsample", 1)
+                "number_of_times_to_upsample": getattr(config, "APP_LOCAL_DETECTION", {}).get("number_of_times_to_upsample", 1),
+                "detection_scale": getattr(config, "APP_LOCAL_DETECTION", {}).get("detection_scale", 1.0),
+                "max_side": getattr(config, "APP_LOCAL_DETECTION", {}).get("max_side", None)
             },
 
             "yolo_detection": {
                 "use_yolo": getattr(config, "APP_YOLO_DETECTION", {}).get("use_yolo", False),
-                "yolo_model_path": getattr(config, "APP_YOLO_DETECTION", {}).get("yolo_model_path", None)
+                "yolo_model_path": getattr(config, "APP_YOLO_DETECTION", {}).get("yolo_model_path", None),
+                "batch_size": getattr(config, "APP_YOLO_DETECTION", {}).get("batch_size", 1),
+                "detection_scale": getattr(config, "APP_YOLO_DETECTION", {}).get("detection_scale", 1.0),
+                "max_side": getattr(config, "APP_YOLO_DETECTION", {}).get("max_side", None)
+            },
+
+            "tracking": {
+                "use_tracking": getattr(config, "APP_TRACKING", {}).get("use_tracking", False),
+                "detection_interval": getattr(config, "APP_TRACKING", {}).get("detection_interval", 10),
+                "scene_cut_threshold": getattr(config, "APP_TRACKING", {}).get("scene_cut_threshold", 0.7),
+                "min_tracked_points": getattr(config, "APP_TRACKING", {}).get("min_tracked_points", 4)
+            },
+
+            "video_stream": {
+                "use_streaming": getattr(config, "APP_VIDEO_STREAM", {}).get("use_streaming", False),
+                "video_processing_path": getattr(config, "APP_VIDEO_STREAM", {}).get("video_processing_path", "../video_processing"),
+                "input_videos_path": getattr(config, "APP_VIDEO_STREAM", {}).get("input_videos_path", None),
+                "allowed_extensions": getattr(config, "APP_VIDEO_STREAM", {}).get("allowed_extensions", [".mp4", ".avi", ".mov", ".webm"]),
+                "frame_rate": getattr(config, "APP_VIDEO_STREAM", {}).get("frame_rate", 10),
+                "use_video_fps": getattr(config, "APP_VIDEO_STREAM", {}).get("use_video_fps", False),
+                "interval_in_seconds": getattr(config, "APP_VIDEO_STREAM", {}).get("interval_in_seconds", 1),
+                "use_frame_number_as_name": getattr(config, "APP_VIDEO_STREAM", {}).get("use_frame_number_as_name", False),
+                "extraction_strategy": getattr(config, "APP_VIDEO_STREAM", {}).get("extraction_strategy", "auto"),
+                "queue_size": getattr(config, "APP_VIDEO_STREAM", {}).get("queue_size", 32),
+                "save_frames": getattr(config, "APP_VIDEO_STREAM", {}).get("save_frames", "faces"),
+                "frame_filter": getattr(config, "APP_VIDEO_STREAM", {}).get("frame_filter", {"use_filter": False})
+            },
+
+            "detection_cache": {
+                "use_cache": getattr(config, "APP_DETECTION_CACHE", {}).get("use_cache", False),
+                "cache_path": getattr(config, "APP_DETECTION_CACHE", {}).get("cache_path", "detection_cache.sqlite"),
+                "max_entries": getattr(config, "APP_DETECTION_CACHE", {}).get("max_entries", 500000)
             },
 
             "api_detection": {
                 "use_api": getattr(config, "APP_API_DETECTION", {}).get("use_api", False),
                 "api_service": getattr(config, "APP_API_DETECTION", {}).get("api_service", None),
-                "api_credentials_path": getattr(config, "APP_API_DETECTION", {}).get("api_credentials_path", None)
+                "api_credentials_path": getattr(config, "APP_API_DETECTION", {}).get("api_credentials_path", None),
+                "api_endpoint": getattr(config, "APP_API_DETECTION", {}).get("api_endpoint", None),
+                "max_concurrent_requests": getattr(config, "APP_API_DETECTION", {}).get("max_concurrent_requests", 8),
+                "max_retries": getattr(config, "APP_API_DETECTION", {}).get("max_retries", 3),
+                "retry_backoff_seconds": getattr(config, "APP_API_DETECTION", {}).get("retry_backoff_seconds", 0.5),
+                "timeout_seconds": getattr(config, "APP_API_DETECTION", {}).get("timeout_seconds", 30),
+                "jpeg_quality": getattr(config, "APP_API_DETECTION", {}).get("jpeg_quality", 90)
             }
         }
         if None in config_dict.values():
@@ -0,0 +1,100 @@
+import time
+import asyncio
+
+import cv2
+import aiohttp
+
+
+class RetryableResponseError(Exception):
+    """Raised for HTTP responses worth retrying (429 and 5xx)."""
+
+
+class ApiDetectionClient:
+    """Asyncio client for an HTTP face detection service.
+
+    Frames are sent as JPEG bodies in POST requests to the configured endpoint. The service
+    must answer with JSON of the form {"faces": [{"top": ..., "right": ..., "bottom": ..., "left": ...}]}.
+    One pooled aiohttp session is reused for every request of the run, at most
+    max_concurrent_requests are in flight at once, and failed requests are retried with
+    exponential backoff.
+    """
+
+    def __init__(self, endpoint, api_key=None, max_concurrent_requests=8, max_retries=3,
+                 retry_backoff_seconds=0.5, timeout_seconds=30, jpeg_quality=90):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.jpeg_quality = jpeg_quality
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self.semaphore = None
+
+    async def _open_session(self):
+        headers = {"Content-Type": "image/jpeg"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrent_requests),
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            headers=headers
+        )
+        self.semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+    async def _post(self, image_bytes):
+        async with self.session.post(self.endpoint, data=image_bytes) as response:
+            if response.status == 429 or response.status >= 500:
+                raise RetryableResponseError(f"HTTP {response.status}")
+            response.raise_for_status()
+            return await response.json()
+
+    async def _detect(self, image_bytes):
+        """Send one frame, retrying transient failures.
+
+        Returns the face locations and the details of the last attempt.
+        """
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                start_time = time.perf_counter()
+                try:
+                    payload = await self._post(image_bytes)
+                    details = {
+                        "status": "success",
+                        "response_time": f"{time.perf_counter() - start_time:.3f}s",
+                        "attempts": attempt + 1
+                    }
+                    return payload.get("faces", []), details
+                except (RetryableResponseError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    retryable = not isinstance(e, aiohttp.ClientResponseError)
+                    if attempt == self.max_retries or not retryable:
+                        details = {
+                            "status": f"error: {e}",
+                            "response_time": f"{time.perf_counter() - start_time:.3f}s",
+                            "attempts": attempt + 1
+                        }
+                        return [], details
+                    await asyncio.sleep(self.retry_backoff_seconds * (2 ** attempt))
+
+    async def _detect_all(self, images):
+        if self.session is None:
+            await self._open_session()
+        return await asyncio.gather(*(self._detect(image_bytes) for image_bytes in images))
+
+    def detect_batch(self, frames):
+        """Detect faces on a list of BGR frames, sending the requests concurrently.
+
+        Returns a list of (face_locations, details) in the order of the frames.
+        """
+        images = [
+            cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])[1].tobytes()
+            for frame in frames
+        ]
+        return self.loop.run_until_complete(self._detect_all(images))
+
+    def close(self):
+        if self.session is not None:
+            self.loop.run_until_complete(self.session.close())
+            self.session = None
+        self.loop.close()
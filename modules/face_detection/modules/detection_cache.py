@@ -0,0 +1,113 @@
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+
+def hash_bytes(data):
+    """Return the SHA-256 hex digest of a bytes object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """Persistent SQLite store of detection results keyed by frame content and detector identity.
+
+    Entries are evicted least-recently-used first once the store grows past max_entries.
+    The cache can be shared by the prefetch threads; every access goes through a lock.
+    """
+
+    def __init__(self, cache_path, detector_identity, max_entries=500000, commit_every=256):
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            "key TEXT PRIMARY KEY, face_locations TEXT, model_type TEXT, "
+            "width INTEGER, height INTEGER, last_access REAL, face_encodings TEXT)"
+        )
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(detections)")]
+        if "face_encodings" not in columns:
+            # Caches created before encodings were stored
+            self.connection.execute("ALTER TABLE detections ADD COLUMN face_encodings TEXT")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON detections (last_access)")
+        self.detector_hash = hash_bytes(detector_identity.encode('utf-8'))
+        self.max_entries = max_entries
+        self.commit_every = commit_every
+        self.pending_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, frame_hash):
+        return f"{frame_hash}:{self.detector_hash}"
+
+    def get(self, frame_hash):
+        """Return (face_locations, model_type, (height, width), face_encodings) for a cached frame, or None."""
+        key = self.make_key(frame_hash)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT face_locations, model_type, width, height, face_encodings FROM detections WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.connection.execute("UPDATE detections SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._written()
+        face_locations, model_type, width, height, face_encodings = row
+        face_encodings = json.loads(face_encodings) if face_encodings else None
+        return json.loads(face_locations), model_type, (height, width), face_encodings
+
+    def put(self, frame_hash, face_locations, model_type, frame_shape, face_encodings=None):
+        """Store the detection result of a frame."""
+        height, width = frame_shape[:2]
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO detections "
+                "(key, face_locations, model_type, width, height, last_access, face_encodings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(frame_hash), json.dumps(face_locations), model_type, width, height, time.time(),
+                    json.dumps(face_encodings) if face_encodings is not None else None
+                )
+            )
+            self._written()
+
+    def _written(self):
+        self.pending_writes += 1
+        if self.pending_writes >= self.commit_every:
+            self.commit()
+
+    def evict(self):
+        """Drop the least recently used entries above max_entries."""
+        count = self.connection.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM detections WHERE key IN "
+                "(SELECT key FROM detections ORDER BY last_access LIMIT ?)", (excess,)
+            )
+
+    def commit(self):
+        with self.lock:
+            self.evict()
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        with self.lock:
+            self.commit()
+            self.connection.close()
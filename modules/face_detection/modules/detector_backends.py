@@ -0,0 +1,239 @@
+import json
+from functools import partial
+
+import cv2
+
+from modules.detection_cache import hash_file
+
+
+def load_yolo_model(model_path=None):
+    """Load the YOLOv8 face model, downloading it from Hugging Face if no path is provided."""
+    from huggingface_hub import hf_hub_download
+    from ultralytics import YOLO
+
+    if model_path is None:
+        model_path = hf_hub_download(repo_id="arnabdhar/YOLOv8-Face-Detection", filename="model.pt")
+    return YOLO(model_path)
+
+
+def yolo_result_to_face_locations(result):
+    """Convert a single YOLO result into the face_locations structure."""
+    from supervision import Detections
+
+    detections = Detections.from_ultralytics(result)
+
+    face_locations = []
+    for box in detections.xyxy:
+        top, left, bottom, right = int(box[1]), int(box[0]), int(box[3]), int(box[2])
+        face_locations.append({"top": top, "right": right, "bottom": bottom, "left": left})
+    return face_locations
+
+
+def resize_for_detection(frame, detection_scale=1.0, max_side=None):
+    """Downscale a frame before detection.
+
+    Returns the resized frame and the scale applied to it. Frames are never enlarged.
+    """
+    scale = detection_scale or 1.0
+    if max_side:
+        scale = min(scale, max_side / max(frame.shape[:2]))
+    if scale >= 1.0:
+        return frame, 1.0
+
+    height, width = frame.shape[:2]
+    new_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA), scale
+
+
+def rescale_face_locations(face_locations, scale):
+    """Map face locations found on a resized frame back to original-frame coordinates."""
+    if scale == 1.0:
+        return face_locations
+    return [{side: int(round(value / scale)) for side, value in loc.items()} for loc in face_locations]
+
+
+def detect_faces_yolo(frame, model_path=None, model=None, detection_scale=1.0, max_side=None):
+    """Detect faces using YOLOv8 model."""
+    if model is None:
+        model = load_yolo_model(model_path)
+
+    # Ultralytics expects numpy images in BGR order, so the OpenCV frame is passed as is
+    small_frame, scale = resize_for_detection(frame, detection_scale, max_side)
+    output = model(small_frame)
+    face_locations = rescale_face_locations(yolo_result_to_face_locations(output[0]), scale)
+    return face_locations, "yolov8-fine", None  # Also returns model type and API details
+
+
+def detect_faces_yolo_batch(frames, model, detection_scale=1.0, max_side=None):
+    """Detect faces on a list of frames with a single YOLOv8 call."""
+    resized = [resize_for_detection(frame, detection_scale, max_side) for frame in frames]
+    output = model([small_frame for small_frame, _ in resized])
+    return [
+        (rescale_face_locations(yolo_result_to_face_locations(result), scale), "yolov8-fine", None)
+        for result, (_, scale) in zip(output, resized)
+    ]
+
+
+def detect_faces_local(frame, detection_parameters):
+    """Detect faces using a local model with specified parameters."""
+    import face_recognition
+
+    small_frame, scale = resize_for_detection(
+        frame, detection_parameters.get("detection_scale", 1.0), detection_parameters.get("max_side")
+    )
+    rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    model = detection_parameters.get("model", "hog")
+    upscale_factor = detection_parameters.get("number_of_times_to_upsample", 1)
+    face_locations = face_recognition.face_locations(rgb_frame, number_of_times_to_upsample=upscale_factor, model=model)
+    face_locations = [{"top": loc[0], "right": loc[1], "bottom": loc[2], "left": loc[3]} for loc in face_locations]
+    return rescale_face_locations(face_locations, scale), model, None
+
+
+def load_api_settings(api_detection):
+    """Return (endpoint, api_credentials) for the configured detection API.
+
+    api_endpoint in the config takes precedence over the endpoint of the credentials file.
+    """
+    api_credentials = {}
+    api_credentials_path = api_detection.get("api_credentials_path")
+    if api_credentials_path:
+        with open(api_credentials_path, 'r', encoding='utf-8') as f:
+            api_credentials = json.load(f)
+
+    endpoint = api_detection.get("api_endpoint") or api_credentials.get("endpoint")
+    if not endpoint:
+        raise ValueError("API detection needs 'api_endpoint' in the config or 'endpoint' in the credentials file.")
+    return endpoint, api_credentials
+
+
+def build_api_client(api_detection):
+    """Create the pooled asynchronous client for the configured detection API."""
+    from modules.api_client import ApiDetectionClient
+
+    endpoint, api_credentials = load_api_settings(api_detection)
+    return ApiDetectionClient(
+        endpoint,
+        api_key=api_credentials.get("api_key"),
+        max_concurrent_requests=api_detection.get("max_concurrent_requests", 8),
+        max_retries=api_detection.get("max_retries", 3),
+        retry_backoff_seconds=api_detection.get("retry_backoff_seconds", 0.5),
+        timeout_seconds=api_detection.get("timeout_seconds", 30),
+        jpeg_quality=api_detection.get("jpeg_quality", 90)
+    )
+
+
+def detect_faces_api_batch(frames, client, api_service):
+    """Detect faces on a list of frames through the API, with requests sent concurrently."""
+    results = []
+    for face_locations, details in client.detect_batch(frames):
+        api_details = {"service": api_service, **details}
+        results.append((face_locations, "api", api_details))
+    return results
+
+
+def detect_faces_api(frame, client, api_service):
+    """Detect faces using an external API."""
+    return detect_faces_api_batch([frame], client, api_service)[0]
+
+
+def build_yolo_backend(yolo_detection):
+    """Build the YOLOv8 backend, which supports batched inference."""
+    model = load_yolo_model(yolo_detection.get("yolo_model_path"))
+    scaling = {
+        "detection_scale": yolo_detection.get("detection_scale", 1.0),
+        "max_side": yolo_detection.get("max_side")
+    }
+    return {
+        "detect": partial(detect_faces_yolo, model=model, **scaling),
+        "detect_batch": partial(detect_faces_yolo_batch, model=model, **scaling),
+        "batch_size": yolo_detection.get("batch_size", 1),
+        "model_type": "yolov8-fine"
+    }
+
+
+def build_local_backend(local_detection):
+    """Build the face_recognition (HOG/CNN) backend."""
+    return {
+        "detect": partial(detect_faces_local, detection_parameters=local_detection),
+        "model_type": local_detection.get("model", "hog")
+    }
+
+
+def build_api_backend(api_detection):
+    """Build the external API backend, sending the frames of a batch concurrently."""
+    client = build_api_client(api_detection)
+    api_service = api_detection.get("api_service")
+    return {
+        "detect": partial(detect_faces_api, client=client, api_service=api_service),
+        "detect_batch": partial(detect_faces_api_batch, client=client, api_service=api_service),
+        # The batch is sized to keep every request slot busy
+        "batch_size": api_detection.get("batch_size", client.max_concurrent_requests),
+        "close": client.close,
+        "model_type": "api",
+        "warm_up": False  # A warm-up call would be billed as a real request
+    }
+
+
+def yolo_identity(yolo_detection):
+    model_path = yolo_detection.get("yolo_model_path")
+    return {
+        "method": "yolo",
+        "weights": hash_file(model_path) if model_path else "arnabdhar/YOLOv8-Face-Detection/model.pt",
+        "detection_scale": yolo_detection.get("detection_scale", 1.0),
+        "max_side": yolo_detection.get("max_side")
+    }
+
+
+def local_identity(local_detection):
+    return {
+        "method": "local",
+        "model": local_detection.get("model", "hog"),
+        "number_of_times_to_upsample": local_detection.get("number_of_times_to_upsample", 1),
+        "detection_scale": local_detection.get("detection_scale", 1.0),
+        "max_side": local_detection.get("max_side")
+    }
+
+
+def api_identity(api_detection):
+    # The endpoint selects the model and version behind the service, and the JPEG quality changes the request
+    endpoint, _ = load_api_settings(api_detection)
+    return {
+        "method": "api",
+        "api_service": api_detection.get("api_service"),
+        "endpoint": endpoint,
+        "jpeg_quality": api_detection.get("jpeg_quality", 90)
+    }
+
+
+# Backends keyed by their config block, in order of precedence when several are enabled.
+# Heavy dependencies are imported inside the backend functions, so only the selected backend pays for them.
+DETECTOR_BACKENDS = {
+    "yolo_detection": {"flag": "use_yolo", "build": build_yolo_backend, "identity": yolo_identity},
+    "local_detection": {"flag": "use_local", "build": build_local_backend, "identity": local_identity},
+    "api_detection": {"flag": "use_api", "build": build_api_backend, "identity": api_identity}
+}
+
+
+def register_backend(config_key, flag, build, identity):
+    """Register a detection backend enabled by config[config_key][flag].
+
+    build(settings) returns a dict with "detect" and "model_type", and optionally
+    "detect_batch", "batch_size", "close" and "warm_up". identity(settings) returns a
+    JSON-serialisable description of everything that changes the backend's output.
+    """
+    DETECTOR_BACKENDS[config_key] = {"flag": flag, "build": build, "identity": identity}
+
+
+def select_backend(config):
+    """Return (settings, backend) for the first enabled backend in the config."""
+    for config_key, backend in DETECTOR_BACKENDS.items():
+        settings = config.get(config_key, {})
+        if settings.get(backend["flag"]):
+            return settings, backend
+    raise ValueError("No detection method was activated.")
+
+
+def backend_identity(config):
+    """Describe the enabled backend as a JSON string, used to key the detection cache."""
+    settings, backend = select_backend(config)
+    return json.dumps(backend["identity"](settings), sort_keys=True)
@@ -1,78 +1,146 @@
 import os
 import json
 import time
+import base64
 from datetime import datetime
+from itertools import groupby
+from multiprocessing import Pool
 
 import cv2
-import face_recognition
-from huggingface_hub import hf_hub_download
-from ultralytics import YOLO
-from supervision import Detections
-from PIL import Image
-
-
-def detect_faces_yolo(frame, model_path=None):
-    """Detect faces using YOLOv8 model."""
-    if model_path is None:
-        # Download YOLOv8 model from Hugging Face if model path is not provided
-        model_path = hf_hub_download(repo_id="arnabdhar/YOLOv8-Face-Detection", filename="model.pt")
-    
-    model = YOLO(model_path)
-    pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    output = model(pil_image)
-    detections = Detections.from_ultralytics(output[0])
-    
-    face_locations = []
-    for box in detections.xyxy:
-        top, left, bottom, right = int(box[1]), int(box[0]), int(box[3]), int(box[2])
-        face_locations.append({"top": top, "right": right, "bottom": bottom, "left": left})
-    return face_locations, "yolov8-fine"  # Also returns model type
-
-
-def detect_faces_local(frame, detection_parameters):
-    """Detect faces using a local model with specified parameters."""
+import numpy as np
+
+from modules import face_tracking, detector_backends, frame_stream
+from modules.frame_io import prefetch, open_writer
+from modules.frame_store import open_frame_store
+from modules.detection_cache import DetectionCache, hash_bytes
+
+
+# Detectors already built in this process, keyed by their detection settings
+_DETECTOR_CACHE = {}
+
+# Settings of a worker process of the frame pool, set by init_worker
+_WORKER_CONFIG = None
+_WORKER_COMPUTE_ENCODINGS = False
+_WORKER_FRAME_STORE = None
+
+
+def build_detector(config):
+    """Build the detection backend selected in the config and warm it up."""
+    start_time = time.time()
+    settings, backend = detector_backends.select_backend(config)
+    detector = {"detect_batch": None, "batch_size": 1, "close": None, "warm_up": True}
+    detector.update(backend["build"](settings))
+
+    # Run a dummy frame through the backend so lazy initialisation is not charged to the first real frame
+    if detector.pop("warm_up"):
+        detector["detect"](np.zeros((64, 64, 3), dtype=np.uint8))
+
+    detector["batch_size"] = max(1, detector["batch_size"])
+    detector["load_time_seconds"] = time.time() - start_time
+    return detector
+
+
+def get_detector(config):
+    """Return the detector for the given config, building it only once per process."""
+    detector_key = json.dumps(
+        {key: config.get(key, {}) for key in detector_backends.DETECTOR_BACKENDS},
+        sort_keys=True, default=str
+    )
+    if detector_key not in _DETECTOR_CACHE:
+        _DETECTOR_CACHE[detector_key] = build_detector(config)
+    return _DETECTOR_CACHE[detector_key]
+
+
+def open_detection_cache(config):
+    """Open the persistent detection cache if it is enabled in the config."""
+    detection_cache = config.get("detection_cache", {})
+    if not detection_cache.get("use_cache"):
+        return None
+    # Entries without encodings must not be served when encodings are requested
+    identity = detector_backends.backend_identity(config)
+    if config.get("compute_encodings"):
+        identity += ":encodings"
+    return DetectionCache(
+        detection_cache.get("cache_path", "detection_cache.sqlite"),
+        identity,
+        max_entries=detection_cache.get("max_entries", 500000)
+    )
+
+
+def read_frame(frame_store, root, frame_file, cache=None):
+    """Read a frame from the frame store, looking it up in the detection cache first when one is given.
+
+    Returns (frame, frame_hash, cached). On a cache hit the image is not decoded and frame is None.
+    """
+    if cache is None:
+        return frame_store.read(root, frame_file), None, None
+
+    frame_bytes = frame_store.read_bytes(root, frame_file)
+    frame_hash = hash_bytes(frame_bytes)
+    cached = cache.get(frame_hash)
+    if cached is not None:
+        return None, frame_hash, cached
+    return cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_COLOR), frame_hash, None
+
+
+def save_cached_result(cached, root, frame_file, frame_path, config, frames_path, faces_output_path, utils, writer):
+    """Write the detection record of a frame served from the detection cache."""
+    face_locations, model_type, frame_shape, face_encodings = cached
+    detection_result = build_detection_result(
+        frame_file, frame_path, frame_shape, face_locations, model_type, 0.0, config, utils,
+        detection_source="cached", face_encodings=face_encodings
+    )
+    writer.submit(
+        save_detection_result, detection_result, root, frame_file, frames_path, faces_output_path, utils,
+        writer.shard_writer
+    )
+
+
+def compute_face_encodings(frame, face_locations):
+    """Compute the 128-d face_recognition encodings of the detected faces while the frame is in memory.
+
+    The encodings are packed as base64 float32 bytes, 512 bytes per face.
+    """
+    import face_recognition
+
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    model = detection_parameters.get("model", "hog")
-    upscale_factor = detection_parameters.get("number_of_times_to_upsample", 1)
-    face_locations = face_recognition.face_locations(rgb_frame, number_of_times_to_upsample=upscale_factor, model=model)
-    return [{"top": loc[0], "right": loc[1], "bottom": loc[2], "left": loc[3]} for loc in face_locations], model
-
-
-def detect_faces_api(frame, api_service, api_credentials):
-    """Placeholder for detection using an external API."""
-    return [{"top": 50, "right": 100, "bottom": 150, "left": 75}], "api"  # Also returns model type
-
-
-def process_frame(frame, config):
-    """Process a frame to detect faces according to the specified method."""
-    local_detection = config.get("local_detection", {})
-    yolo_detection = config.get("yolo_detection", {})
-    api_detection = config.get("api_detection", {})
-    
-    if yolo_detection.get("use_yolo"):
-        model_path = yolo_detection.get("yolo_model_path")
-        return detect_faces_yolo(frame, model_path)
-    elif local_detection.get("use_local"):
-        return detect_faces_local(frame, local_detection)
-    elif api_detection.get("use_api"):
-        api_service = api_detection.get("api_service")
-        api_credentials = None
-        api_credentials_path = api_detection.get("api_credentials_path")
-        if api_credentials_path:
-            with open(api_credentials_path, 'r', encoding='utf-8') as f:
-                api_credentials = json.load(f)
-        return detect_faces_api(frame, api_service, api_credentials)
-    else:
-        raise ValueError("No detection method was activated.")
+    encodings = face_recognition.face_encodings(
+        rgb_frame, known_face_locations=[
+            (loc['top'], loc['right'], loc['bottom'], loc['left']) for loc in face_locations
+        ]
+    )
+    matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+    return {
+        "dtype": "float32",
+        "shape": list(matrix.shape),
+        "data": base64.b64encode(matrix.tobytes()).decode('ascii')
+    }
 
 
-def process_all_frames(config, utils):
-    frames_path = config.get("frames_path")
+def close_detectors():
+    """Release the resources held by the detectors built in this process."""
+    for detector in _DETECTOR_CACHE.values():
+        if detector["close"] is not None:
+            detector["close"]()
+    _DETECTOR_CACHE.clear()
+
+
+def process_frame(frame, config, detector=None):
+    """Process a frame to detect faces according to the specified method.
+
+    Returns the face locations, the model type and the API call details (None for local backends).
+    """
+    if detector is None:
+        detector = get_detector(config)
+    return detector["detect"](frame)
+
+
+def get_faces_output_path(config):
+    """Return the output folder, optionally nested under the detection model name."""
     faces_output_path = config.get("faces_output_path")
-    create_model_folder = config.get("create_model_folder", False)
-    
+
     # Define output folder name based on the detection method and model
-    if create_model_folder:
+    if config.get("create_model_folder", False):
         if config["yolo_detection"].get("use_yolo"):
             model_name = "yolov8-fine"
         elif config["local_detection"].get("use_local"):
@@ -83,53 +151,375 @@ def process_all_frames(config, utils):
             model_name = "default"
 
         faces_output_path = os.path.join(faces_output_path, model_name)
-    
+    return faces_output_path
+
+
+def build_detection_result(frame_file, frame_path, frame_shape, face_locations, model_type, processing_time, config, utils,
+                           detection_source="detected", api_details=None, face_encodings=None):
+    """Build the JSON record written for a processed frame."""
+    # Frame metadata
+    height, width = frame_shape[:2]
+    frame_number = int(os.path.splitext(frame_file)[0].split('_')[-1])
+
+    detection_result = {
+        "frame_file": frame_file,
+        "absolute_image_path": utils['format_path_for_json'](frame_path),
+        "timestamp": datetime.now().isoformat(),
+        "detection_method": model_type,
+        "detection_source": detection_source,
+        "num_faces_detected": len(face_locations),
+        "face_locations": face_locations,
+        "frame_metadata": {
+            "width": width,
+            "height": height,
+            "frame_number": frame_number
+        },
+        "processing_time_seconds": round(processing_time, 4),
+        "api_details": api_details or {
+            "service": config["api_detection"].get("api_service") if model_type == "api" else "not_applicable",
+            "status": "not_applicable",
+            "response_time": "not_applicable"
+        }
+    }
+    if face_encodings is not None:
+        detection_result["face_encodings"] = face_encodings
+    return detection_result
+
+
+def save_detection_result(detection_result, root, frame_file, frames_path, faces_output_path, utils, shard_writer=None):
+    """Write a detection record next to its frame's relative folder in the output path.
+
+    With a shard writer the record is appended to the folder's JSONL shard instead of its own file.
+    """
+    relative_path = os.path.relpath(root, frames_path)
+    output_subdir = os.path.normpath(os.path.join(faces_output_path, relative_path))
+    utils['ensure_directory'](output_subdir)
+
+    if shard_writer is not None:
+        shard_writer.append(output_subdir, detection_result)
+        return
+
+    output_file = os.path.join(output_subdir, f"{os.path.splitext(frame_file)[0]}_faces.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(detection_result, f, indent=4)
+
+
+def save_frame_image(frame_path, frame, utils):
+    """Write a frame decoded in memory as a JPEG, for frames kept by the streaming mode."""
+    utils['ensure_directory'](os.path.dirname(frame_path))
+    cv2.imwrite(frame_path, frame)
+
+
+def process_batch(batch, config, detector, frames_path, faces_output_path, utils, writer, cache=None,
+                  save_frames=None):
+    """Detect faces on a batch of (root, frame_file, frame_path, frame, frame_hash) entries and save the results.
+
+    save_frames is used for frames streamed in memory: "all" writes every frame to frame_path,
+    "faces" only the frames where faces were found.
+    Returns the inference time spent on the batch.
+    """
+    frames = [entry[3] for entry in batch]
+
+    start_time = time.time()
+    if len(frames) > 1:
+        results = detector["detect_batch"](frames)
+    else:
+        results = [process_frame(frames[0], config, detector)]
+    batch_time = time.time() - start_time
+
+    # Batched inference cannot be attributed to a single frame, so each frame gets its share
+    processing_time = batch_time / len(frames)
+    for (root, frame_file, frame_path, frame, frame_hash), (face_locations, model_type, api_details) in zip(batch, results):
+        face_encodings = compute_face_encodings(frame, face_locations) if config.get("compute_encodings") else None
+        if cache is not None:
+            cache.put(frame_hash, face_locations, model_type, frame.shape, face_encodings)
+        detection_result = build_detection_result(
+            frame_file, frame_path, frame.shape, face_locations, model_type, processing_time, config, utils,
+            api_details=api_details, face_encodings=face_encodings
+        )
+        if save_frames == "all" or (save_frames == "faces" and face_locations):
+            writer.submit(save_frame_image, frame_path, frame, utils)
+        writer.submit(
+            save_detection_result, detection_result, root, frame_file, frames_path, faces_output_path, utils,
+            writer.shard_writer
+        )
+    return batch_time
+
+
+def init_worker(config):
+    """Set up a worker process of the frame pool. The detector is built on its first cache miss."""
+    global _WORKER_CONFIG, _WORKER_COMPUTE_ENCODINGS, _WORKER_FRAME_STORE
+    _WORKER_CONFIG = config
+    _WORKER_COMPUTE_ENCODINGS = config.get("compute_encodings", False)
+    _WORKER_FRAME_STORE = open_frame_store(config.get("frames_path"), config.get("frame_store_format", "files"))
+
+
+def hash_frame_file(entry):
+    """Read a single (root, frame_file) frame inside a worker process and return its content hash."""
+    return hash_bytes(_WORKER_FRAME_STORE.read_bytes(*entry))
+
+
+def detect_frame_file(entry):
+    """Read and process a single (root, frame_file) frame inside a worker process.
+
+    Returns the face locations, model type, API details, inference time, frame shape and face encodings.
+    """
+    detector = get_detector(_WORKER_CONFIG)
+    frame = _WORKER_FRAME_STORE.read(*entry)
+    start_time = time.time()
+    face_locations, model_type, api_details = detector["detect"](frame)
+    processing_time = time.time() - start_time
+    face_encodings = compute_face_encodings(frame, face_locations) if _WORKER_COMPUTE_ENCODINGS else None
+    return face_locations, model_type, api_details, processing_time, frame.shape, face_encodings
+
+
+def process_frames_in_pool(config, frame_store, frames_path, faces_output_path, utils, writer, workers, cache=None):
+    """Spread frame detection over a process pool, writing results from the main process in frame order.
+
+    With the detection cache, workers first read and hash the frames, and the main process only looks
+    the hashes up. Only the misses are then detected, so a run served from the cache never builds a detector.
+    """
+    frames = list(frame_store.iter_frames())
+    if not frames:
+        return
+    chunksize = max(1, config.get("chunksize", 8))
+
+    frames_processed = 0
+    total_inference_time = 0.0
+    with Pool(processes=workers, initializer=init_worker, initargs=(config,)) as pool:
+        if cache is not None:
+            frame_hashes = pool.map(hash_frame_file, frames, chunksize=chunksize)
+        else:
+            frame_hashes = [None] * len(frames)
+        entries = []
+        for (root, frame_file), frame_hash in zip(frames, frame_hashes):
+            cached = cache.get(frame_hash) if cache is not None else None
+            entries.append((root, frame_file, os.path.join(root, frame_file), frame_hash, cached))
+        missed_frames = [(root, frame_file) for root, frame_file, _, _, cached in entries if cached is None]
+
+        # imap keeps results in submission order, so output files are identical to a serial run
+        results = pool.imap(detect_frame_file, missed_frames, chunksize=chunksize)
+        for root, frame_file, frame_path, frame_hash, cached in entries:
+            if cached is not None:
+                save_cached_result(
+                    cached, root, frame_file, frame_path, config, frames_path, faces_output_path, utils, writer
+                )
+                continue
+
+            face_locations, model_type, api_details, processing_time, frame_shape, face_encodings = next(results)
+            if cache is not None:
+                cache.put(frame_hash, face_locations, model_type, frame_shape, face_encodings)
+            detection_result = build_detection_result(
+                frame_file, frame_path, frame_shape, face_locations, model_type, processing_time, config, utils,
+                api_details=api_details, face_encodings=face_encodings
+            )
+            writer.submit(
+                save_detection_result, detection_result, root, frame_file, frames_path, faces_output_path, utils,
+                writer.shard_writer
+            )
+            frames_processed += 1
+            total_inference_time += processing_time
+
+    if frames_processed:
+        print(
+            f"Processed {frames_processed} frames with {workers} workers: "
+            f"{total_inference_time / frames_processed:.4f}s of inference per frame."
+        )
+
+
+def process_frames_with_tracking(config, detector, frame_store, frames_path, faces_output_path, utils, writer):
+    """Run the detector every N frames or on scene cuts and track boxes with optical flow in between.
+
+    Tracking state is kept per frame folder, so boxes never leak from one video into another.
+    """
+    tracking = config.get("tracking", {})
+    detection_interval = max(1, tracking.get("detection_interval", 10))
+    scene_cut_threshold = tracking.get("scene_cut_threshold", 0.7)
+    min_tracked_points = tracking.get("min_tracked_points", 4)
+
+    frames = prefetch(
+        frame_store.iter_frames(), lambda entry: frame_store.read(*entry),
+        config.get("prefetch_size", 0), config.get("io_threads", 4)
+    )
+
+    detected_frames = 0
+    tracked_frames = 0
+    for root, entries in groupby(frames, key=lambda loaded: loaded[0][0]):
+        previous_gray = None
+        face_locations = []
+        frames_since_detection = 0
+        for (_, frame_file), frame in entries:
+            frame_path = os.path.join(root, frame_file)
+
+            start_time = time.time()
+            gray = face_tracking.to_gray(frame)
+            tracked_locations = None
+            api_details = None
+            if (previous_gray is not None and frames_since_detection < detection_interval
+                    and not face_tracking.is_scene_cut(previous_gray, gray, scene_cut_threshold)):
+                tracked_locations = face_tracking.track_face_locations(
+                    previous_gray, gray, face_locations, min_tracked_points
+                )
+
+            if tracked_locations is None:
+                face_locations, model_type, api_details = process_frame(frame, config, detector)
+                detection_source = "detected"
+                frames_since_detection = 1
+                detected_frames += 1
+            else:
+                face_locations = tracked_locations
+                model_type = detector["model_type"]
+                detection_source = "tracked"
+                frames_since_detection += 1
+                tracked_frames += 1
+            processing_time = time.time() - start_time
+            previous_gray = gray
+
+            face_encodings = compute_face_encodings(frame, face_locations) if config.get("compute_encodings") else None
+            detection_result = build_detection_result(
+                frame_file, frame_path, frame.shape, face_locations, model_type, processing_time, config, utils,
+                detection_source=detection_source, api_details=api_details, face_encodings=face_encodings
+            )
+            writer.submit(
+                save_detection_result, detection_result, root, frame_file, frames_path, faces_output_path, utils,
+                writer.shard_writer
+            )
+
+    total_frames = detected_frames + tracked_frames
+    if total_frames:
+        print(f"Tracking: detector ran on {detected_frames} of {total_frames} frames, {tracked_frames} frames were tracked.")
+
+
+def load_detector(config):
+    """Return the detector for the config, reporting how long it took to load."""
+    detector = get_detector(config)
+    print(f"Detector '{detector['model_type']}' loaded in {detector['load_time_seconds']:.2f}s")
+    return detector
+
+
+def detect_frames_in_batches(frames, config, frames_path, faces_output_path, utils, writer, cache=None, save_frames=None):
+    """Detect faces on (root, frame_file, frame, frame_hash, cached) entries, batching frames when the backend supports it.
+
+    Entries with a cached result are written without detection, after the pending batch, so records
+    are written in frame order. The detector is loaded on the first miss, so a run served from the
+    cache never loads it. save_frames is passed to process_batch.
+    """
+    detector = None
+    batch_size = 1
+    frames_processed = 0
+    total_inference_time = 0.0
+    batch = []
+    for root, frame_file, frame, frame_hash, cached in frames:
+        frame_path = os.path.join(root, frame_file)
+        if cached is not None:
+            if batch:
+                total_inference_time += process_batch(
+                    batch, config, detector, frames_path, faces_output_path, utils, writer, cache, save_frames
+                )
+                frames_processed += len(batch)
+                batch = []
+            save_cached_result(
+                cached, root, frame_file, frame_path, config, frames_path, faces_output_path, utils, writer
+            )
+            continue
+
+        if detector is None:
+            detector = load_detector(config)
+            batch_size = detector["batch_size"] if detector["detect_batch"] is not None else 1
+        batch.append((root, frame_file, frame_path, frame, frame_hash))
+        if len(batch) >= batch_size:
+            total_inference_time += process_batch(
+                batch, config, detector, frames_path, faces_output_path, utils, writer, cache, save_frames
+            )
+            frames_processed += len(batch)
+            batch = []
+
+    if batch:
+        total_inference_time += process_batch(
+            batch, config, detector, frames_path, faces_output_path, utils, writer, cache, save_frames
+        )
+        frames_processed += len(batch)
+
+    if frames_processed:
+        print(
+            f"Processed {frames_processed} frames: {total_inference_time:.2f}s of inference "
+            f"({total_inference_time / frames_processed:.4f}s per frame), "
+            f"plus {detector['load_time_seconds']:.2f}s one-time model load."
+        )
+
+
+def process_frames_in_process(config, frame_store, frames_path, faces_output_path, utils, writer, cache=None):
+    """Detect faces on every extracted frame in the main process."""
+    # Frames are read and decoded on background threads while the current batch is being detected
+    frames = prefetch(
+        frame_store.iter_frames(), lambda entry: read_frame(frame_store, *entry, cache),
+        config.get("prefetch_size", 0), config.get("io_threads", 4)
+    )
+    detect_frames_in_batches(
+        ((root, frame_file, frame, frame_hash, cached) for (root, frame_file), (frame, frame_hash, cached) in frames),
+        config, frames_path, faces_output_path, utils, writer, cache
+    )
+
+
+def process_video_stream(config, frames_path, faces_output_path, utils, writer):
+    """Detect faces on frames decoded straight from the input videos, without a JPEG round trip.
+
+    Frames are named and laid out as if they had been extracted under frames_path, so records
+    and outputs match the file-based path. Only the frames selected by save_frames are written.
+    """
+    stream_config = config["video_stream"]
+    frames = (
+        (os.path.join(frames_path, video_name), frame_file, frame, None, None)
+        for video_name, frame_file, frame in frame_stream.stream_frames(stream_config)
+    )
+    detect_frames_in_batches(
+        frames, config, frames_path, faces_output_path, utils, writer,
+        save_frames=stream_config.get("save_frames", "faces")
+    )
+
+
+def process_all_frames(config, utils):
+    frames_path = config.get("frames_path")
+    faces_output_path = get_faces_output_path(config)
     utils['ensure_directory'](faces_output_path)
 
-    for root, dirs, files in os.walk(frames_path):
-        for frame_file in files:
-            if frame_file.endswith('.jpg'):
-                frame_path = os.path.join(root, frame_file)
-                frame = cv2.imread(frame_path)
-                
-                # Start timing the processing
-                start_time = time.time()
-
-                # Process the frame and get detections along with model type
-                face_locations, model_type = process_frame(frame, config)
-                
-                # End timing the processing
-                processing_time = time.time() - start_time
-
-                # Frame metadata
-                height, width = frame.shape[:2]
-                frame_number = int(os.path.splitext(frame_file)[0].split('_')[-1])
-
-                # Enhanced output structure
-                detection_result = {
-                    "frame_file": frame_file,
-                    "absolute_image_path": utils['format_path_for_json'](frame_path),
-                    "timestamp": datetime.now().isoformat(),
-                    "detection_method": model_type,
-                    "num_faces_detected": len(face_locations),
-                    "face_locations": face_locations,
-                    "frame_metadata": {
-                        "width": width,
-                        "height": height,
-                        "frame_number": frame_number
-                    },
-                    "processing_time_seconds": round(processing_time, 4),
-                    "api_details": {
-                        "service": config["api_detection"].get("api_service") if model_type == "api" else "not_applicable",
-                        "status": "success" if model_type == "api" else "not_applicable",
-                        "response_time": "0.25s" if model_type == "api" else "not_applicable"
-                    }
-                }
-
-                relative_path = os.path.relpath(root, frames_path)
-                output_subdir = os.path.join(faces_output_path, relative_path)
-                utils['ensure_directory'](output_subdir)
-
-                output_file = os.path.join(output_subdir, f"{os.path.splitext(frame_file)[0]}_faces.json")
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(detection_result, f, indent=4)
+    stream_config = config.get("video_stream", {})
+    streaming = stream_config.get("use_streaming", False)
+    tracking = config.get("tracking", {}).get("use_tracking", False)
+    frame_store_format = config.get("frame_store_format", "files")
+    # Data association reloads the frame images of records without encodings
+    if not streaming and frame_store_format == "shards" and not config.get("compute_encodings"):
+        raise ValueError("frame_store_format 'shards' requires compute_encodings: data association cannot read frames from shards.")
+    if streaming and stream_config.get("save_frames", "faces") == "none" and not config.get("compute_encodings"):
+        print("Warning: streamed frames are not saved with save_frames 'none', so data association cannot re-encode them; enable compute_encodings.")
+
+    writer = open_writer(config.get("async_write", False), output_format=config.get("output_format", "json"))
+    cache = None
+    frame_store = None
+    try:
+        # Streaming and tracking run in the main process, whatever the number of workers
+        workers = 1 if streaming or tracking else config.get("workers", 1)
+        if not streaming:
+            frame_store = open_frame_store(frames_path, frame_store_format)
+        if not streaming and not tracking:
+            cache = open_detection_cache(config)
+        if workers > 1:
+            process_frames_in_pool(config, frame_store, frames_path, faces_output_path, utils, writer, workers, cache)
+            return
+
+        if streaming:
+            process_video_stream(config, frames_path, faces_output_path, utils, writer)
+        elif tracking:
+            process_frames_with_tracking(
+                config, load_detector(config), frame_store, frames_path, faces_output_path, utils, writer
+            )
+        else:
+            process_frames_in_process(config, frame_store, frames_path, faces_output_path, utils, writer, cache)
+    finally:
+        writer.close()
+        close_detectors()
+        if frame_store is not None:
+            frame_store.close()
+        if cache is not None:
+            print(f"Detection cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate():.1%} hit rate).")
+            cache.close()
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+
+def to_gray(frame):
+    """Convert a BGR frame to the grayscale image used for tracking."""
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def is_scene_cut(previous_gray, gray, threshold=0.7):
+    """Return True when the histogram correlation between two frames drops below the threshold."""
+    if previous_gray.shape != gray.shape:
+        return True
+    previous_hist = cv2.calcHist([previous_gray], [0], None, [64], [0, 256])
+    hist = cv2.calcHist([gray], [0], None, [64], [0, 256])
+    cv2.normalize(previous_hist, previous_hist)
+    cv2.normalize(hist, hist)
+    return cv2.compareHist(previous_hist, hist, cv2.HISTCMP_CORREL) < threshold
+
+
+def track_face_locations(previous_gray, gray, face_locations, min_tracked_points=4):
+    """Propagate face boxes from the previous frame with sparse Lucas-Kanade optical flow.
+
+    Each box is shifted by the median motion of the feature points found inside it.
+    Returns None when any box cannot be tracked reliably, so the caller can fall back to detection.
+    """
+    height, width = gray.shape[:2]
+    tracked_locations = []
+    for loc in face_locations:
+        mask = np.zeros_like(previous_gray)
+        mask[max(0, loc["top"]):max(0, loc["bottom"]), max(0, loc["left"]):max(0, loc["right"])] = 255
+        points = cv2.goodFeaturesToTrack(previous_gray, maxCorners=50, qualityLevel=0.01, minDistance=3, mask=mask)
+        if points is None or len(points) < min_tracked_points:
+            return None
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(previous_gray, gray, points, None)
+        found = status.reshape(-1) == 1
+        if found.sum() < min_tracked_points:
+            return None
+
+        dx, dy = np.median((new_points[found] - points[found]).reshape(-1, 2), axis=0)
+        dx, dy = int(round(dx)), int(round(dy))
+        tracked_locations.append({
+            "top": min(max(0, loc["top"] + dy), height),
+            "right": min(max(0, loc["right"] + dx), width),
+            "bottom": min(max(0, loc["bottom"] + dy), height),
+            "left": min(max(0, loc["left"] + dx), width)
+        })
+    return tracked_locations
@@ -0,0 +1,153 @@
+import os
+import json
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def prefetch(items, load, prefetch_size=8, io_threads=4):
+    """Yield (item, load(item)) in input order while the next items are loaded on a thread pool.
+
+    At most prefetch_size loaded items are held in memory at any time.
+    With prefetch_size <= 0 items are loaded inline.
+    """
+    if prefetch_size <= 0:
+        for item in items:
+            yield item, load(item)
+        return
+
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=max(1, io_threads)) as executor:
+        pending = deque()
+        for item in iterator:
+            pending.append((item, executor.submit(load, item)))
+            if len(pending) >= prefetch_size:
+                break
+
+        while pending:
+            item, future = pending.popleft()
+            next_item = next(iterator, None)
+            if next_item is not None:
+                pending.append((next_item, executor.submit(load, next_item)))
+            yield item, future.result()
+
+
+class DetectionShardWriter:
+    """Append detection records to one JSONL shard per output folder (one per video).
+
+    Each shard gets an index file mapping frame_number to the byte offset of its record,
+    so a single frame can be read back without scanning the shard. Frames arrive folder
+    by folder, so only the current shard is kept open.
+    """
+
+    def __init__(self):
+        self.current_subdir = None
+        self.shard_file = None
+        self.index = None
+        self.started_subdirs = set()
+
+    @staticmethod
+    def shard_paths(output_subdir):
+        """Return the shard and index paths used for an output folder."""
+        name = os.path.basename(os.path.normpath(output_subdir))
+        return (
+            os.path.join(output_subdir, f"{name}_faces.jsonl"),
+            os.path.join(output_subdir, f"{name}_faces.index.json")
+        )
+
+    def append(self, output_subdir, record):
+        if output_subdir != self.current_subdir:
+            self._close_current()
+            shard_path, index_path = self.shard_paths(output_subdir)
+            if output_subdir in self.started_subdirs:
+                # The folder was already written in this run, so keep appending to it
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)["offsets"]
+                self.shard_file = open(shard_path, 'ab')
+            else:
+                self.index = {}
+                self.shard_file = open(shard_path, 'wb')
+                self.started_subdirs.add(output_subdir)
+            self.current_subdir = output_subdir
+
+        self.index[str(record["frame_metadata"]["frame_number"])] = self.shard_file.tell()
+        self.shard_file.write((json.dumps(record) + "\n").encode('utf-8'))
+
+    def _close_current(self):
+        if self.shard_file is None:
+            return
+        self.shard_file.close()
+        shard_path, index_path = self.shard_paths(self.current_subdir)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump({"shard": os.path.basename(shard_path), "offsets": self.index}, f)
+        self.shard_file = None
+        self.current_subdir = None
+
+    def close(self):
+        self._close_current()
+
+
+class ImmediateWriter:
+    """Run write callables right away in the calling thread."""
+
+    def __init__(self, shard_writer=None):
+        self.shard_writer = shard_writer
+
+    def submit(self, function, *args, **kwargs):
+        function(*args, **kwargs)
+
+    def close(self):
+        if self.shard_writer is not None:
+            self.shard_writer.close()
+
+
+class AsyncWriter:
+    """Run write callables on a background thread, in submission order.
+
+    The queue is bounded so a slow disk applies back-pressure instead of buffering every result.
+    The first error raised by a write is re-raised on the next submit or on close.
+    """
+
+    def __init__(self, max_pending=64, shard_writer=None):
+        self.shard_writer = shard_writer
+        self.tasks = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            if self.error is None:
+                function, args, kwargs = task
+                try:
+                    function(*args, **kwargs)
+                except Exception as e:
+                    self.error = e
+
+    def submit(self, function, *args, **kwargs):
+        if self.error is not None:
+            raise self.error
+        self.tasks.put((function, args, kwargs))
+
+    def close(self):
+        self.tasks.put(None)
+        self.thread.join()
+        if self.shard_writer is not None:
+            self.shard_writer.close()
+        if self.error is not None:
+            raise self.error
+
+
+def open_writer(async_write=False, max_pending=64, output_format="json"):
+    """Return a background writer when async_write is set, otherwise one that writes inline.
+
+    With output_format "jsonl" the writer carries a DetectionShardWriter for the records.
+    """
+    shard_writer = DetectionShardWriter() if output_format == "jsonl" else None
+    if async_write:
+        return AsyncWriter(max_pending, shard_writer=shard_writer)
+    return ImmediateWriter(shard_writer=shard_writer)
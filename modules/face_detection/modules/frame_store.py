@@ -0,0 +1,96 @@
+import os
+import json
+import threading
+
+import cv2
+import numpy as np
+
+
+def iter_frame_files(frames_path):
+    """Yield (root, frame_file) for every extracted frame under frames_path."""
+    for root, dirs, files in os.walk(frames_path):
+        # Zero-padded frame names sort in frame order
+        for frame_file in sorted(files):
+            if frame_file.endswith('.jpg'):
+                yield root, frame_file
+
+
+class FileFrameStore:
+    """Frames extracted as one JPEG file per frame."""
+
+    def __init__(self, frames_path):
+        self.frames_path = frames_path
+
+    def iter_frames(self):
+        return iter_frame_files(self.frames_path)
+
+    def read_bytes(self, root, frame_file):
+        with open(os.path.join(root, frame_file), 'rb') as f:
+            return f.read()
+
+    def read(self, root, frame_file):
+        return cv2.imread(os.path.join(root, frame_file))
+
+    def close(self):
+        pass
+
+
+class ShardFrameStore:
+    """Frames packed by video_processing into shard files, read with random access.
+
+    Every <prefix>.frames.json index under frames_path maps frame numbers to a (shard, offset, length)
+    byte range, so a frame is read with one seek instead of opening its own file. A folder can hold
+    several indexes, one per extracted segment. Shard files are kept open, and reads are locked so
+    the prefetch threads can share them.
+    """
+
+    def __init__(self, frames_path):
+        self.frames_path = frames_path
+        # {root: {frame_file: (shard_path, offset, length)}}
+        self.locations = {}
+        for root, dirs, files in os.walk(frames_path):
+            for index_file in sorted(files):
+                if index_file.endswith('.frames.json'):
+                    self._load_index(root, index_file)
+        self.open_shards = {}
+        self.lock = threading.Lock()
+
+    def _load_index(self, root, index_file):
+        with open(os.path.join(root, index_file), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        shard_paths = [os.path.join(root, shard) for shard in index["shards"]]
+        locations = self.locations.setdefault(root, {})
+        for frame_number, (shard, offset, length) in index["frames"].items():
+            locations[f"frame_{int(frame_number):09d}.jpg"] = (shard_paths[shard], offset, length)
+
+    def iter_frames(self):
+        for root in sorted(self.locations):
+            for frame_file in sorted(self.locations[root]):
+                yield root, frame_file
+
+    def read_bytes(self, root, frame_file):
+        shard_path, offset, length = self.locations[root][frame_file]
+        with self.lock:
+            shard = self.open_shards.get(shard_path)
+            if shard is None:
+                shard = self.open_shards[shard_path] = open(shard_path, 'rb')
+            shard.seek(offset)
+            return shard.read(length)
+
+    def read(self, root, frame_file):
+        frame_bytes = self.read_bytes(root, frame_file)
+        return cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def close(self):
+        for shard in self.open_shards.values():
+            shard.close()
+        self.open_shards = {}
+
+
+def open_frame_store(frames_path, store_format="files"):
+    """Return the frame store for the format video_processing extracted the frames in ("files" or "shards")."""
+    if store_format == "shards":
+        return ShardFrameStore(frames_path)
+    if store_format != "files":
+        raise ValueError(f"Unknown frame store format: {store_format}")
+    return FileFrameStore(frames_path)
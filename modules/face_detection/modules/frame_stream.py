@@ -0,0 +1,90 @@
+import os
+import queue
+import threading
+import importlib.util
+
+
+# Folder of the face_detection micro project, which relative video_processing paths start from
+FACE_DETECTION_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_video_processing(video_processing_path):
+    """Import video_processing_module.py from the video_processing micro project folder."""
+    video_processing_path = os.path.join(FACE_DETECTION_PATH, video_processing_path)
+    module_path = os.path.join(video_processing_path, "modules", "video_processing_module.py")
+    spec = importlib.util.spec_from_file_location("video_processing_module", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def iter_stream_frames(stream_config):
+    """Yield (video_name, frame_file, frame) for the sampled frames of every input video, in memory."""
+    video_processing = load_video_processing(stream_config["video_processing_path"])
+    video_files = video_processing.list_video_files(
+        stream_config["input_videos_path"], stream_config.get("allowed_extensions", [".mp4", ".avi", ".mov", ".webm"])
+    )
+    for video_file in sorted(video_files):
+        video_path = os.path.join(stream_config["input_videos_path"], video_file)
+        frame_filter = video_processing.build_frame_filter(stream_config.get("frame_filter"))
+        frames = video_processing.iter_video_frames(
+            video_path,
+            stream_config.get("frame_rate", 10),
+            use_video_fps=stream_config.get("use_video_fps", False),
+            interval_in_seconds=stream_config.get("interval_in_seconds", 1),
+            use_frame_number_as_name=stream_config.get("use_frame_number_as_name", False),
+            extraction_strategy=stream_config.get("extraction_strategy", "auto"),
+            frame_filter=frame_filter
+        )
+        for frame_file, frame in frames:
+            yield os.path.splitext(video_file)[0], frame_file, frame
+        if frame_filter is not None:
+            # Same summary as the video processing module prints after extraction
+            video_processing.print_filter_summary(video_path, frame_filter)
+
+
+def stream_frames(stream_config):
+    """Decode the frames on a background thread and yield them through a bounded queue.
+
+    At most queue_size decoded frames wait for detection, so decoding overlaps detection
+    without buffering the whole video. Errors raised while decoding are re-raised here.
+    """
+    frames = queue.Queue(maxsize=max(1, stream_config.get("queue_size", 32)))
+    done = object()
+    stop = threading.Event()
+    errors = []
+
+    def put(item):
+        """Wait for room in the queue; give up when the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iter_stream_frames(stream_config):
+                if not put(item):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        # The consumer stopped early: let the producer exit
+        stop.set()
+    thread.join()
+    if errors:
+        raise errors[0]
@@ -10,15 +10,35 @@ APP_PATH_DATA = os.path.join(APP_PATH_ROOT, 'data')
 APP_PATH_FRAMES = os.path.join(APP_PATH_DATA, 'frames')
 APP_PATH_FACES_OUTPUT = os.path.join(APP_PATH_DATA, 'faces_detected')
 
+# Format the frames were extracted in: 'files' (one JPEG per frame) or 'shards' (packed shard files with an index, requires compute_encodings)
+APP_PARAMETER_FRAME_STORE_FORMAT = 'files'
+
 # Parameter to create a folder with the model's name
 APP_PARAMETER_CREATE_MODEL_FOLDER = True
 
+# Output format: 'json' (one file per frame) or 'jsonl' (one shard per video with an offset index)
+APP_PARAMETER_OUTPUT_FORMAT = 'json'
+
+# Compute the 128-d face encodings while the frame is in memory, so data association never reloads the frames
+APP_PARAMETER_COMPUTE_ENCODINGS = False
+
+# Number of detection processes (1 keeps detection in the main process)
+APP_PARAMETER_WORKERS = 1
+APP_PARAMETER_CHUNKSIZE = 8                     # Frames handed to a worker at a time
+
+# Background I/O: frames read and decoded ahead of detection, results written off the main thread
+APP_PARAMETER_PREFETCH_SIZE = 8                 # Maximum frames decoded ahead (0 disables prefetching)
+APP_PARAMETER_IO_THREADS = 4                    # Threads used to read and decode frames
+APP_PARAMETER_ASYNC_WRITE = True                # Write output files on a background thread
+
 # Face detection settings using local model
 APP_LOCAL_DETECTION = {
     "use_local": False,                         # Defines if the local method will be used
     "model": "hog",                             # Detection model: 'hog' or 'cnn'
     "upscale_factor": 1,
-    "number_of_times_to_upsample": 1
+    "number_of_times_to_upsample": 1,
+    "detection_scale": 1.0,                     # Downscale factor applied before detection (boxes are mapped back)
+    "max_side": None                            # Optional maximum frame side in pixels before detection
 }
 
 # Face detection settings using YOLOv8
@@ -28,12 +48,53 @@ APP_YOLO_DETECTION = {
         APP_PATH_MODELS,
         'yolov8-face-detection',
         'model.pt'
-    )
+    ),
+    "batch_size": 1,                            # Number of frames sent to the model in a single call
+    "detection_scale": 1.0,                     # Downscale factor applied before detection (boxes are mapped back)
+    "max_side": None                            # Optional maximum frame side in pixels before detection
+}
+
+# Detect-then-track settings: the detector runs every N frames or on a scene cut,
+# and boxes are propagated with optical flow in between
+APP_TRACKING = {
+    "use_tracking": False,                      # Defines if tracking will be used between detections
+    "detection_interval": 10,                   # Run the real detector at least every N frames
+    "scene_cut_threshold": 0.7,                 # Histogram correlation below which a frame counts as a scene cut
+    "min_tracked_points": 4                     # Feature points needed inside a box to trust the tracker
+}
+
+# Detection on frames decoded straight from the videos, without extracting them as JPEGs first
+APP_VIDEO_STREAM = {
+    "use_streaming": False,                     # Defines if frames are streamed from the videos instead of read from frames_path
+    "video_processing_path": os.path.join(APP_PATH_ROOT, 'modules', 'video_processing'),   # video_processing micro project
+    "input_videos_path": os.path.join(APP_PATH_DATA, 'input_videos'),
+    "allowed_extensions": ['.mp4', '.avi', '.mov', '.webm'],
+    "frame_rate": 10,                           # Same sampling parameters as video_processing
+    "use_video_fps": True,
+    "interval_in_seconds": 5,
+    "use_frame_number_as_name": True,
+    "extraction_strategy": 'auto',
+    "queue_size": 32,                           # Decoded frames waiting for detection
+    "save_frames": 'faces',                     # Frames written to frames_path: 'all', 'faces' (only with faces) or 'none'
+    "frame_filter": {"use_filter": False}       # Near-duplicate filter, same settings as in video_processing
+}
+
+# Persistent cache of detection results keyed by frame content and detector settings
+APP_DETECTION_CACHE = {
+    "use_cache": False,                         # Defines if cached detections will be reused
+    "cache_path": os.path.join(APP_PATH_DATA, 'detection_cache.sqlite'),
+    "max_entries": 500000                       # Least recently used entries are evicted above this size
 }
 
 # Settings for using external API
 APP_API_DETECTION = {
     "use_api": False,                           # Defines if the API method will be used
     "api_service": None,                        # API service (Azure, Google Vision, AWS, etc.)
-    "api_credentials_path": None                # Path to the API credentials file
+    "api_credentials_path": None,               # Path to the API credentials file
+    "api_endpoint": None,                       # Detection endpoint URL (or 'endpoint' in the credentials file)
+    "max_concurrent_requests": 8,               # Requests in flight at the same time
+    "max_retries": 3,                           # Retries for timeouts, connection errors, HTTP 429 and 5xx
+    "retry_backoff_seconds": 0.5,               # Base delay of the exponential backoff between retries
+    "timeout_seconds": 30,                      # Total timeout of a single request
+    "jpeg_quality": 90                          # JPEG quality of the frames sent to the API
 }
@@ -15,16 +15,29 @@ def run_report_generation(params, utils_functions):
         json_filename=params["json_filename"]
     )
 
+def load_associations(association_results_path):
+    """Load the associations from associations.jsonl (one record per line) or associations.json.
+
+    When both exist the most recently written one is used. Returns None when neither exists.
+    """
+    candidates = [
+        os.path.join(association_results_path, name) for name in ("associations.jsonl", "associations.json")
+        if os.path.exists(os.path.join(association_results_path, name))
+    ]
+    if not candidates:
+        return None
+
+    associations_file = max(candidates, key=os.path.getmtime)
+    with open(associations_file, 'r', encoding='utf-8') as f:
+        if associations_file.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
 def generate_reports(association_results_path, reports_output_path, csv_filename, json_filename):
-    associations = []
-    
-    # Load all associations from associations.json
-    associations_file = os.path.join(association_results_path, "associations.json")
-    if os.path.exists(associations_file):
-        with open(associations_file, 'r', encoding='utf-8') as f:
-            associations = json.load(f)
-    else:
-        print(f"Associations file not found: {associations_file}")
+    # Load all associations from associations.jsonl or associations.json
+    associations = load_associations(association_results_path)
+    if associations is None:
+        print(f"Associations file not found in: {association_results_path}")
         return
 
     # Generate enhanced JSON report with a summary header
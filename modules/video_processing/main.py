@@ -14,7 +14,13 @@ def load_config_from_py():
             "use_video_fps": getattr(config, "APP_PARAMETER_USE_VIDEO_FPS", None),
             "interval_in_seconds": getattr(config, "APP_PARAMETER_INTERVAL_IN_SECONDS", None),
             "use_frame_number_as_name": getattr(config, "APP_PARAMETER_USE_FRAME_NUMBER_AS_NAME", None),
-            "allowed_extensions": getattr(config, "APP_ALLOWED_EXTENSIONS", None)
+            "allowed_extensions": getattr(config, "APP_ALLOWED_EXTENSIONS", None),
+            "extraction_strategy": getattr(config, "APP_PARAMETER_EXTRACTION_STRATEGY", "auto"),
+            "seek_min_interval": getattr(config, "APP_PARAMETER_SEEK_MIN_INTERVAL", 300),
+            "workers": getattr(config, "APP_PARAMETER_WORKERS", 1),
+            "segment_seconds": getattr(config, "APP_PARAMETER_SEGMENT_SECONDS", 600),
+            "frame_filter": getattr(config, "APP_FRAME_FILTER", {"use_filter": False}),
+            "frame_store": getattr(config, "APP_FRAME_STORE", {"format": "files"})
         }
         if None in config_dict.values():
             missing_keys = [k for k, v in config_dict.items() if v is None]
@@ -1,43 +1,333 @@
 import os
+import json
+from multiprocessing import Pool
+
 import cv2
+import numpy as np
 
 
-def extract_frames(video_path, output_dir, frame_rate, ensure_directory, use_video_fps=False, interval_in_seconds=1, use_frame_number_as_name=False):
-    """Extract frames from video at a specified rate."""
-    ensure_directory(output_dir)
+# A partir deste intervalo (em frames) o modo "auto" busca cada frame por seek em vez de avançar com grab()
+SEEK_MIN_INTERVAL = 300
+
+
+def choose_extraction_strategy(frame_interval, strategy="auto", seek_min_interval=SEEK_MIN_INTERVAL):
+    """Resolve the "auto" strategy: grab() for short intervals, seeking for long ones."""
+    if strategy == "auto":
+        return "seek" if frame_interval >= seek_min_interval else "grab"
+    if strategy not in ("read", "grab", "seek"):
+        raise ValueError(f"Estratégia de extração inválida: '{strategy}'.")
+    return strategy
+
+
+# Limiar padrão de cada assinatura, na escala da sua distância (0 = frames idênticos)
+FILTER_THRESHOLDS = {
+    "gray": 0.02,        # Diferença absoluta média de miniaturas 16x16 em tons de cinza, em [0, 1]
+    "histogram": 0.01,   # 1 - correlação de histogramas de cinza com 32 faixas
+    "phash": 0.1         # Fração de bits diferentes de um hash perceptual de 64 bits
+}
+
+
+def gray_signature(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (16, 16), interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+
+def histogram_signature(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    hist = cv2.calcHist([gray], [0], None, [32], [0, 256])
+    cv2.normalize(hist, hist)
+    return hist
+
+
+def phash_signature(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    dct = cv2.dct(cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32))[:8, :8]
+    return dct > np.median(dct)
+
+
+FILTER_SIGNATURES = {
+    "gray": (gray_signature, lambda a, b: float(np.mean(np.abs(a - b)))),
+    "histogram": (histogram_signature, lambda a, b: 1.0 - cv2.compareHist(a, b, cv2.HISTCMP_CORREL)),
+    "phash": (phash_signature, lambda a, b: float(np.mean(a != b)))
+}
+
+
+class FrameFilter:
+    """Drop sampled frames that are too similar to the last kept frame.
+
+    Each frame is reduced to a cheap signature (a grayscale thumbnail, a histogram or a
+    perceptual hash) and compared with the signature of the last kept frame. Frames closer
+    than the threshold are dropped. With max_consecutive_drops, a frame is kept anyway after
+    that many drops in a row, so long static shots are still sampled now and then.
+    """
+
+    def __init__(self, method="gray", threshold=None, max_consecutive_drops=0):
+        if method not in FILTER_SIGNATURES:
+            raise ValueError(f"Método de filtro de frames inválido: '{method}'.")
+        self.method = method
+        self.signature, self.distance = FILTER_SIGNATURES[method]
+        self.threshold = FILTER_THRESHOLDS[method] if threshold is None else threshold
+        self.max_consecutive_drops = max_consecutive_drops
+        self.last_signature = None
+        self.consecutive_drops = 0
+        self.counts = {"first": 0, "changed": 0, "forced": 0, "near_duplicate": 0}
+
+    def keep(self, frame):
+        """Return True when the frame should be kept, recording why it was kept or dropped."""
+        signature = self.signature(frame)
+        if self.last_signature is None:
+            reason = "first"
+        elif self.distance(self.last_signature, signature) >= self.threshold:
+            reason = "changed"
+        elif self.max_consecutive_drops and self.consecutive_drops >= self.max_consecutive_drops:
+            reason = "forced"
+        else:
+            reason = "near_duplicate"
+
+        self.counts[reason] += 1
+        if reason == "near_duplicate":
+            self.consecutive_drops += 1
+            return False
+        self.last_signature = signature
+        self.consecutive_drops = 0
+        return True
+
+    def summary(self):
+        kept = self.counts["first"] + self.counts["changed"] + self.counts["forced"]
+        return (
+            f"{kept} frames mantidos ({self.counts['first']} primeiro, {self.counts['changed']} com mudança, "
+            f"{self.counts['forced']} forçados), {self.counts['near_duplicate']} descartados como quase duplicados "
+            f"({self.method}, distância < {self.threshold})"
+        )
+
+
+def print_filter_summary(video_path, frame_filter, start_frame=0, end_frame=None):
+    """Print the kept and dropped frame counts of a video (or of one of its segments)."""
+    segment = f" (frames {start_frame}-{end_frame if end_frame is not None else 'fim'})" if start_frame or end_frame else ""
+    print(f"Filtro de frames em '{os.path.basename(video_path)}'{segment}: {frame_filter.summary()}")
+
+
+def build_frame_filter(settings):
+    """Build a FrameFilter from a frame_filter settings block, or return None when it is disabled."""
+    if not settings or not settings.get("use_filter"):
+        return None
+    return FrameFilter(
+        method=settings.get("method", "gray"),
+        threshold=settings.get("threshold"),
+        max_consecutive_drops=settings.get("max_consecutive_drops", 0)
+    )
+
+
+def iter_sampled_frames(video_capture, frame_interval, strategy="grab", start_frame=0, end_frame=None):
+    """Yield (frame_count, frame) for every frame_interval-th frame of an opened video.
+
+    Sampling starts at start_frame, which must be a multiple of frame_interval, and stops before
+    end_frame. "read" decodes every frame, "grab" advances over skipped frames without retrieving
+    them, and "seek" jumps straight to each sampled frame, which only pays off for long intervals.
+    """
+    frame_count = start_frame
+    if start_frame > 0:
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    while video_capture.isOpened() and (end_frame is None or frame_count < end_frame):
+        if strategy == "seek" and frame_count > start_frame:
+            video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_count)
+
+        if frame_count % frame_interval == 0 or strategy == "read":
+            ret, frame = video_capture.read()
+        else:
+            ret, frame = video_capture.grab(), None
+        if not ret:
+            break
+
+        if frame_count % frame_interval == 0:
+            yield frame_count, frame
+        frame_count += frame_interval if strategy == "seek" else 1
+
+
+def compute_frame_interval(fps, frame_rate, use_video_fps=False, interval_in_seconds=1):
+    """Number of video frames between two sampled frames."""
+    if use_video_fps:
+        # Calcula o intervalo com base em segundos, ignorando o frame_rate
+        return max(1, int(fps * interval_in_seconds))
+    # Usa frame_rate diretamente para extrair a cada N frames
+    return max(1, frame_rate)
+
+
+def open_video(video_path):
+    """Open a video and return (video_capture, fps), validating its fps."""
     video_capture = cv2.VideoCapture(video_path)
     fps = video_capture.get(cv2.CAP_PROP_FPS)
-    
+
     # Valida o fps do vídeo
     if fps <= 0:
         video_capture.release()
         raise ValueError(f"O valor de FPS do vídeo '{video_path}' é inválido (fps = {fps}).")
+    return video_capture, fps
 
-    # Define o intervalo de frames
-    if use_video_fps:
-        # Calcula o intervalo com base em segundos, ignorando o frame_rate
-        frame_interval = int(fps * interval_in_seconds)
+
+def iter_video_frames(video_path, frame_rate, use_video_fps=False, interval_in_seconds=1, use_frame_number_as_name=False,
+                      extraction_strategy="auto", seek_min_interval=SEEK_MIN_INTERVAL, start_frame=0, end_frame=None,
+                      frame_filter=None):
+    """Yield (frame_file, frame) for the sampled frames of a video, in memory.
+
+    frame_file is the name extract_frames gives the frame. It only depends on the position of the
+    frame in the video, so segments (start_frame, end_frame) can be extracted independently.
+    With a FrameFilter, sampled frames too similar to the last kept one are skipped.
+    """
+    video_capture, fps = open_video(video_path)
+    frame_interval = compute_frame_interval(fps, frame_rate, use_video_fps, interval_in_seconds)
+    strategy = choose_extraction_strategy(frame_interval, extraction_strategy, seek_min_interval)
+
+    try:
+        for frame_count, frame in iter_sampled_frames(video_capture, frame_interval, strategy, start_frame, end_frame):
+            # Define o nome do arquivo com o número do frame no vídeo ou em sequência (a partir de 1)
+            if frame_filter is not None and not frame_filter.keep(frame):
+                continue
+            frame_number = frame_count + 1 if use_frame_number_as_name else frame_count // frame_interval + 1
+            yield f"frame_{frame_number:09d}.jpg", frame
+    finally:
+        video_capture.release()
+
+
+def downscale_frame(frame, max_shorter_side):
+    """Downscale a frame so its shorter side is at most max_shorter_side (0 or None keeps it as is)."""
+    if not max_shorter_side or min(frame.shape[:2]) <= max_shorter_side:
+        return frame
+    scale = max_shorter_side / min(frame.shape[:2])
+    size = (round(frame.shape[1] * scale), round(frame.shape[0] * scale))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+class FrameShardWriter:
+    """Write the sampled frames of a video as JPEGs packed into a few shard files, instead of one file per frame.
+
+    Frames are appended to <prefix>_<n>.frames shards of at most frames_per_shard frames, and
+    <prefix>.frames.json maps each frame number to its (shard, offset, length), so any frame can be
+    read back without scanning. The index is written last, so an interrupted extraction leaves no
+    index rather than a partial one.
+    """
+
+    def __init__(self, output_dir, prefix, frames_per_shard=1000, jpeg_quality=95, max_shorter_side=0):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.frames_per_shard = max(1, frames_per_shard)
+        self.jpeg_quality = jpeg_quality
+        self.max_shorter_side = max_shorter_side
+        self.shards = []
+        self.frames = {}
+        self.shard_file = None
+        self.shard_frames = 0
+
+    def append(self, frame_file, frame):
+        if self.shard_file is None or self.shard_frames >= self.frames_per_shard:
+            self._open_next_shard()
+        frame = downscale_frame(frame, self.max_shorter_side)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError(f"Não foi possível codificar o frame '{frame_file}' em JPEG.")
+        frame_number = int(os.path.splitext(frame_file)[0].split('_')[-1])
+        self.frames[str(frame_number)] = [len(self.shards) - 1, self.shard_file.tell(), len(encoded)]
+        self.shard_file.write(encoded.tobytes())
+        self.shard_frames += 1
+
+    def _open_next_shard(self):
+        if self.shard_file is not None:
+            self.shard_file.close()
+        shard_name = f"{self.prefix}_{len(self.shards):04d}.frames"
+        self.shards.append(shard_name)
+        self.shard_file = open(os.path.join(self.output_dir, shard_name), 'wb')
+        self.shard_frames = 0
+
+    def close(self):
+        if self.shard_file is not None:
+            self.shard_file.close()
+            self.shard_file = None
+        index_path = os.path.join(self.output_dir, f"{self.prefix}.frames.json")
+        temporary_path = f"{index_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": "jpeg",
+                "jpeg_quality": self.jpeg_quality,
+                "max_shorter_side": self.max_shorter_side,
+                "shards": self.shards,
+                "frames": self.frames
+            }, f)
+        os.replace(temporary_path, index_path)
+
+
+def remove_frame_shards(output_dir):
+    """Delete the frame shards and indexes left in a video folder by a previous extraction."""
+    if not os.path.isdir(output_dir):
+        return
+    for file_name in os.listdir(output_dir):
+        if file_name.endswith((".frames", ".frames.json", ".frames.json.tmp")):
+            os.remove(os.path.join(output_dir, file_name))
+
+
+def extract_frames(video_path, output_dir, frame_rate, ensure_directory, use_video_fps=False, interval_in_seconds=1,
+                   use_frame_number_as_name=False, extraction_strategy="auto", seek_min_interval=SEEK_MIN_INTERVAL,
+                   start_frame=0, end_frame=None, frame_filter_settings=None, frame_store_settings=None):
+    """Extract frames from video at a specified rate.
+
+    start_frame and end_frame restrict extraction to one segment of the video.
+    frame_filter_settings enables the near-duplicate filter (see build_frame_filter).
+    With frame_store_settings format "shards", frames are packed into shard files (see FrameShardWriter).
+    """
+    ensure_directory(output_dir)
+    frame_filter = build_frame_filter(frame_filter_settings)
+    frames = iter_video_frames(
+        video_path, frame_rate, use_video_fps, interval_in_seconds, use_frame_number_as_name,
+        extraction_strategy, seek_min_interval, start_frame, end_frame, frame_filter
+    )
+    frame_store_settings = frame_store_settings or {}
+    if frame_store_settings.get("format", "files") == "shards":
+        # Cada segmento escreve seus próprios shards, nomeados pelo frame inicial
+        shard_writer = FrameShardWriter(
+            output_dir, f"frames_{start_frame:09d}",
+            frames_per_shard=frame_store_settings.get("frames_per_shard", 1000),
+            jpeg_quality=frame_store_settings.get("jpeg_quality", 95),
+            max_shorter_side=frame_store_settings.get("max_shorter_side", 0)
+        )
+        for frame_file, frame in frames:
+            shard_writer.append(frame_file, frame)
+        shard_writer.close()
     else:
-        # Usa frame_rate diretamente para extrair a cada N frames
-        frame_interval = max(1, frame_rate)
+        for frame_file, frame in frames:
+            cv2.imwrite(os.path.join(output_dir, frame_file), frame)
 
-    frame_count = 0
-    saved_frame_count = 1  # Inicializa a contagem para iniciar o nome do frame a partir de 1
+    if frame_filter is not None:
+        print_filter_summary(video_path, frame_filter, start_frame, end_frame)
 
-    while video_capture.isOpened():
-        ret, frame = video_capture.read()
-        if not ret:
-            break
-        if frame_count % frame_interval == 0:
-            # Define o nome do arquivo com o número do frame no vídeo ou em sequência
-            frame_number = frame_count + 1 if use_frame_number_as_name else saved_frame_count
-            frame_filename = os.path.join(output_dir, f"frame_{frame_number:09d}.jpg")
-            cv2.imwrite(frame_filename, frame)
-            saved_frame_count += 1
-        frame_count += 1
 
+def list_video_files(input_videos_path, allowed_extensions):
+    """Return the video files of a folder with one of the allowed extensions."""
+    return [f for f in os.listdir(input_videos_path) if any(f.endswith(ext) for ext in allowed_extensions)]
+
+
+def plan_segments(video_path, frame_rate, use_video_fps=False, interval_in_seconds=1, segment_seconds=0):
+    """Split a video into (start_frame, end_frame) segments of about segment_seconds.
+
+    Boundaries fall on sampled frames, so each segment keeps the sampling grid of the whole video.
+    The last segment is open-ended (end_frame None), as reported frame counts can be approximate.
+    """
+    video_capture, fps = open_video(video_path)
+    total_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
     video_capture.release()
 
+    frame_interval = compute_frame_interval(fps, frame_rate, use_video_fps, interval_in_seconds)
+    if segment_seconds <= 0 or total_frames <= 0:
+        return [(0, None)]
+    segment_frames = max(1, round(segment_seconds * fps / frame_interval)) * frame_interval
+    starts = list(range(0, total_frames, segment_frames))
+    return [(start, end) for start, end in zip(starts, starts[1:] + [None])]
+
+
+def extract_segment(job):
+    """Pool task: extract the frames of one (video_path, output_dir, start_frame, end_frame, options) job."""
+    video_path, output_dir, start_frame, end_frame, options = job
+    extract_frames(video_path, output_dir, start_frame=start_frame, end_frame=end_frame, **options)
+    return video_path
+
 
 def process_videos(config, utils):
     input_videos_path = config.get("input_videos_path")
@@ -47,6 +337,7 @@ def process_videos(config, utils):
     interval_in_seconds = config.get("interval_in_seconds")
     use_frame_number_as_name = config.get("use_frame_number_as_name")
     allowed_extensions = config.get("allowed_extensions")
+    workers = config.get("workers", 1)
 
     # Verifica se os diretórios de entrada e saída existem
     if not os.path.exists(input_videos_path):
@@ -55,16 +346,40 @@ def process_videos(config, utils):
         utils['ensure_directory'](frames_path)  # Cria o diretório de saída, se não existir
 
     # Processa cada vídeo no diretório de entrada
-    video_files = [f for f in os.listdir(input_videos_path) if any(f.endswith(ext) for ext in allowed_extensions)]
+    video_files = list_video_files(input_videos_path, allowed_extensions)
     if not video_files:
         print("Nenhum arquivo de vídeo encontrado no diretório de entrada com as extensões permitidas.")
         return
 
+    options = {
+        "frame_rate": frame_rate,
+        "ensure_directory": utils['ensure_directory'],
+        "use_video_fps": use_video_fps,
+        "interval_in_seconds": interval_in_seconds,
+        "use_frame_number_as_name": use_frame_number_as_name,
+        "extraction_strategy": config.get("extraction_strategy", "auto"),
+        "seek_min_interval": config.get("seek_min_interval", SEEK_MIN_INTERVAL),
+        "frame_filter_settings": config.get("frame_filter"),
+        "frame_store_settings": config.get("frame_store")
+    }
+    # Com vários workers, vídeos longos são divididos em segmentos extraídos em paralelo
+    segment_seconds = config.get("segment_seconds", 0) if workers > 1 else 0
+
+    jobs = []
     for video_file in video_files:
         video_path = os.path.join(input_videos_path, video_file)
         output_dir = os.path.join(frames_path, os.path.splitext(video_file)[0])
-        extract_frames(
-            video_path, output_dir, frame_rate, utils['ensure_directory'],
-            use_video_fps=use_video_fps, interval_in_seconds=interval_in_seconds,
-            use_frame_number_as_name=use_frame_number_as_name
-        )
+        if (config.get("frame_store") or {}).get("format", "files") == "shards":
+            # Os índices de uma extração anterior (com outros segmentos) não podem se misturar aos novos
+            remove_frame_shards(output_dir)
+        segments = plan_segments(video_path, frame_rate, use_video_fps, interval_in_seconds, segment_seconds)
+        jobs.extend((video_path, output_dir, start_frame, end_frame, options) for start_frame, end_frame in segments)
+
+    if workers > 1:
+        with Pool(workers) as pool:
+            for _ in pool.imap_unordered(extract_segment, jobs):
+                pass
+        print(f"{len(video_files)} vídeos extraídos em {len(jobs)} segmentos com {workers} workers.")
+    else:
+        for job in jobs:
+            extract_segment(job)
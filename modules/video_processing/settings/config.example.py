@@ -14,3 +14,23 @@ APP_PARAMETER_FRAME_RATE = 10                                   # Sets extractio
 APP_PARAMETER_USE_VIDEO_FPS = True                              # Determines if the video's FPS should be used
 APP_PARAMETER_INTERVAL_IN_SECONDS = 5                           # Extracts a frame every 5 seconds (used when USE_VIDEO_FPS = True)
 APP_PARAMETER_USE_FRAME_NUMBER_AS_NAME = True                   # Uses the frame number in the filename
+APP_PARAMETER_EXTRACTION_STRATEGY = 'auto'                      # 'read' decodes every frame, 'grab' skips without decoding, 'seek' jumps to each frame, 'auto' picks grab or seek
+APP_PARAMETER_SEEK_MIN_INTERVAL = 300                           # Frame interval from which 'auto' seeks instead of grabbing
+APP_PARAMETER_WORKERS = 1                                       # Worker processes extracting videos and segments in parallel (1 runs in-process)
+APP_PARAMETER_SEGMENT_SECONDS = 600                             # With several workers, videos are split into segments of this length (0 disables it)
+
+# Near-duplicate filter: sampled frames too similar to the last kept frame are not saved
+APP_FRAME_FILTER = {
+    "use_filter": False,                                        # Defines if the filter is applied
+    "method": "gray",                                           # 'gray' (16x16 thumbnail), 'histogram' or 'phash' (perceptual hash)
+    "threshold": None,                                          # Minimum distance to keep a frame (None uses the method default)
+    "max_consecutive_drops": 0                                  # Keep a frame anyway after this many drops in a row (0 disables it)
+}
+
+# Frame store: one JPEG file per frame, or frames packed into a few shard files per video with an index
+APP_FRAME_STORE = {
+    "format": "files",                                          # 'files' (frame_<n>.jpg) or 'shards' (<prefix>_<n>.frames + <prefix>.frames.json)
+    "frames_per_shard": 1000,                                   # Maximum frames per shard file
+    "jpeg_quality": 95,                                         # JPEG quality of the packed frames (0-100)
+    "max_shorter_side": 0                                       # Downscale frames whose shorter side is larger (0 keeps the original size)
+}